@@ -38,13 +38,16 @@ def stringWithArrows(text, pos_start, pos_end):
 ################
 
 
-class Error:
+class Error(Exception):
     def __init__(self, startPos, endPos, name, details):
         self.startPos = startPos
         self.endPos = endPos
         self.name = name
         self.details = details
 
+    def __str__(self):
+        return repr(self)
+
     def __repr__(self):
         res = f"{self.name}: {self.details}\n"
         res += f"File {self.startPos.fn}, line {self.startPos.ln + 1}\n\n"
@@ -73,19 +76,16 @@ class RTError(Error):
         self.context = context
 
     def generateTraceback(self):
-        res = ""
+        lines = []
         pos = self.startPos
         ctx = self.context
 
         while ctx:
-            oldRes = res
-            res = f"  File {pos.fn}, line {pos.ln + 1}, in {ctx.displayName}\n"
-            res += f"  Module {pos.module}\n"
-            res += oldRes
+            lines.append(f"  File {pos.fn}, line {pos.ln + 1}, in {ctx.displayName}\n  Module {pos.module}\n")
             pos = ctx.parentEntryPos
             ctx = ctx.parent
 
-        return "Traceback (most recent call last):\n" + res
+        return "Traceback (most recent call last):\n" + "".join(reversed(lines))
 
     def __repr__(self):
         res = self.generateTraceback()
@@ -94,12 +94,26 @@ class RTError(Error):
         return res + "\n"
 
 
+class OperationError(Exception):
+    def __init__(self, details, onRight=False):
+        super().__init__(details)
+        self.details = details
+        self.onRight = onRight
+
+    def build(self, node, context):
+        if self.onRight:
+            node = node.rNode
+        return RTError(node.startPos, node.endPos, self.details, context)
+
+
 ################
 # POSITION
 ################
 
 
 class Position:
+    __slots__ = ("idx", "ln", "col", "fn", "ftxt", "module")
+
     def __init__(self, idx, ln, col, fn, ftxt, module):
         self.idx = idx
         self.ln = ln
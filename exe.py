@@ -4,16 +4,47 @@ if sys.platform != "ios":
     import readline
 
 import language
+import values
+import languageInterpreter
+import languageInliner
 from languageInterpreter import KB
 
-if len(sys.argv) > 1:
+options = {}
+while len(sys.argv) > 1 and sys.argv[1].startswith("--"):
+    option, _, optionValue = sys.argv.pop(1)[2:].partition("=")
+    options[option] = optionValue
+
+engine = options.get("engine", "interpreter")
+optimize = options.get("optimize", "on") != "off"
+recursionLimit = options.get("recursion-limit", str(values.RECURSION_LIMIT))
+tierUpCalls = options.get("tier-up-calls", str(languageInterpreter.TIER_UP_CALLS))
+tierUpIterations = options.get("tier-up-iterations", str(languageInterpreter.TIER_UP_ITERATIONS))
+
+if engine not in language.ENGINES:
+    print(f"Unknown engine '{engine}', expected one of: {', '.join(language.ENGINES)}")
+elif not recursionLimit.isdigit():
+    print(f"Invalid recursion limit '{recursionLimit}', expected a positive integer")
+elif not tierUpCalls.isdigit():
+    print(f"Invalid tier-up call count '{tierUpCalls}', expected a positive integer")
+elif not tierUpIterations.isdigit():
+    print(f"Invalid tier-up iteration count '{tierUpIterations}', expected a positive integer")
+elif len(sys.argv) > 1:
+    values.RECURSION_LIMIT = int(recursionLimit)
+    languageInterpreter.TIER_UP_CALLS = int(tierUpCalls)
+    languageInterpreter.TIER_UP_ITERATIONS = int(tierUpIterations)
     if os.path.isfile(sys.argv[1]):
         with open(sys.argv[1]) as f:
             KB.set_getch_term()
-            res, err = language.run(sys.argv[1], f.read())
+            res, err = language.run(sys.argv[1], f.read(), engine=engine, optimize=optimize)
             KB.set_normal_term()
             if err:
                 print(err)
+            if "tier-log" in options:
+                for event in languageInterpreter.tierLog:
+                    print(f"Tier-up: {event}")
+            if "inline-log" in options:
+                for decision in languageInliner.inlineLog:
+                    print(f"Inlining: {decision}")
     else:
         print("File not found")
 else:
@@ -1,9 +1,16 @@
 import error
 import sys
 
-from languageInterpreter import SymbolTable, Number, Interpreter, Context
+from languageInterpreter import SymbolTable, Number, NONE, Interpreter, Context, ReturnSignal, BreakSignal
+from languageCompiler import Compiler
+from languageVM import VM
+from languageTranspiler import Transpiler
 from languageLexer import Lexer
 from languageParser import Parser
+from languageOptimizer import Optimizer
+from languageInliner import Inliner
+from languageResolver import Resolver
+from languageInference import TypeInferrer
 
 """
 Best Language Ever
@@ -16,8 +23,15 @@ extension: .ble
 
 globalSymbolTable = SymbolTable()
 
+ENGINES = {
+    Interpreter.engine: Interpreter,
+    Compiler.engine: Compiler,
+    VM.engine: VM,
+    Transpiler.engine: Transpiler
+}
 
-def run(fn, text, module="<main>", context=None, dev=False):
+
+def run(fn, text, module="<main>", context=None, dev=False, engine=Interpreter.engine, optimize=True):
     try:
         sys.setrecursionlimit(2**15-1)
         lexer = Lexer(fn, text, module)
@@ -30,12 +44,24 @@ def run(fn, text, module="<main>", context=None, dev=False):
         if ast.err:
             return None, ast.err
 
-        interpreter = Interpreter(dev)
+        if optimize:
+            ast.node = Optimizer().optimize(ast.node)
+            ast.node = Inliner().inline(ast.node)
+        Resolver().resolve(ast.node)
+        if optimize:
+            TypeInferrer().infer(ast.node)
+
+        interpreter = ENGINES[engine](dev, optimize)
         if context is None:
             context = Context("<program>")
             context.symbolTable = globalSymbolTable
-        res = interpreter.visit(ast.node, context)
-
-        return res.value, res.err
+        try:
+            return interpreter.visit(ast.node, context), None
+        except error.RTError as err:
+            return None, err
+        except ReturnSignal as ret:
+            return ret.value, None
+        except BreakSignal:
+            return NONE, None
     except KeyboardInterrupt:
         return None, " Keyboard Interrupt"
@@ -0,0 +1,556 @@
+import sys
+
+from error import RTError
+import tokens as tok
+from values import NoneValue, Number, String, Function, List, TRUE, FALSE, NONE, BOOL_AND, BOOL_OR, STRINGS, box
+from languageInterpreter import (
+    Interpreter, BUILTINS, BreakSignal, ReturnSignal, TailCallSignal, cachedAccess, cachedLookup,
+    NUMERIC, UNARY_SIGNS, applyUnboxed, applySign
+)
+import languageParser as lp
+
+################
+# COMPILER
+################
+
+
+class Compiler(Interpreter):
+    engine = "closure"
+    quickening = False
+    tiering = False
+
+    def visit(self, node, context):
+        return self.compile(node)(context)
+
+    def compile(self, node):
+        closure = getattr(node, "closure", None)
+        if closure is None:
+            if node.generic is not None:
+                node.__class__ = node.generic
+            methodName = f"compile{type(node).__name__}"
+            method = getattr(self, methodName, self.compileFallback)
+            closure = method(node)
+            node.closure = closure
+        return closure
+
+    def compileFallback(self, node):
+        method = getattr(self, f"visit{type(node).__name__}", self.noVisitMethod)
+
+        def fallback(context):
+            return method(node, context)
+        return fallback
+
+    def compileConstant(self, value):
+        def constant(context):
+            return value
+        return constant
+
+    def compileNumberNode(self, node):
+        return self.compileConstant(Number(node.tkn.value))
+
+    def compileNoneValueNode(self, node):
+        return self.compileConstant(NONE)
+
+    def compileStringNode(self, node):
+        return self.compileConstant(String(node.tkn.value))
+
+    def compileListNode(self, node):
+        elements = [self.compile(exprNode) for exprNode in node.exprNodes]
+
+        def makeList(context):
+            return List([element(context) for element in elements])
+        return makeList
+
+    def compileVarAccessNode(self, node):
+        varName = node.varNameTkn.value
+        module = node.startPos.module
+
+        if varName == "true":
+            return self.compileConstant(TRUE)
+        elif varName == "false":
+            return self.compileConstant(FALSE)
+        elif varName == "module":
+            def varAccess(context):
+                return String(module)
+        elif varName == "argv":
+            def varAccess(context):
+                return List([String(arg) for arg in sys.argv[1:]])
+        elif varName in BUILTINS:
+            return self.compileConstant(NONE)
+        elif node.slot is None:
+            def varAccess(context):
+                value = cachedLookup(node, context.symbolTable)
+                if value is None:
+                    return NONE
+                return value
+        else:
+            slot = node.slot
+
+            def varAccess(context):
+                value = context.symbolTable.slots[slot]
+                if value is None:
+                    value = cachedLookup(node, context.symbolTable.parent)
+                    if value is None:
+                        return NONE
+                return value
+        return varAccess
+
+    def compileVarAssignNode(self, node):
+        varName = node.varNameTkn.value
+        valueClosure = self.compile(node.valueNode)
+        if varName in BUILTINS:
+            return valueClosure
+
+        if node.slot is not None:
+            slot = node.slot
+
+            def varAssign(context):
+                value = valueClosure(context)
+                context.symbolTable.slots[slot] = None if isinstance(value, NoneValue) else value
+                return value
+            return varAssign
+
+        def varAssign(context):
+            value = valueClosure(context)
+            context.symbolTable.set(varName, value)
+            return value
+        return varAssign
+
+    def compileUnboxed(self, node):
+        if node.generic is not None:
+            node.__class__ = node.generic
+        nodeType = type(node)
+        if nodeType is lp.NumberNode:
+            value = node.tkn.value
+
+            def number(context):
+                return value
+            return number
+
+        if nodeType is lp.VarAccessNode and node.valueType is Number:
+            slot = node.slot
+            closure = self.compile(node)
+
+            def numberAccess(context):
+                value = context.symbolTable.slots[slot]
+                if type(value) is not Number:
+                    value = closure(context)
+                    if type(value) is not Number:
+                        return value
+                return value.value
+            return numberAccess
+
+        if nodeType is lp.BinOpNode and node.operandTypes == STRINGS and node.operator.unboxed is not None:
+            left = self.compileUnboxed(node.lNode)
+            right = self.compileUnboxed(node.rNode)
+            handler = node.operator.specialize(String, String)
+
+            def stringBinOp(context):
+                lValue = left(context)
+                rValue = right(context)
+                if type(lValue) is String and type(rValue) is String:
+                    result, err = handler(lValue, rValue)
+                    if err:
+                        raise err.build(node, context)
+                    return result
+                return applyUnboxed(node, lValue, rValue, context)
+            return stringBinOp
+
+        if nodeType is lp.BinOpNode and node.operator is not None and node.operator.unboxed is not None:
+            left = self.compileUnboxed(node.lNode)
+            right = self.compileUnboxed(node.rNode)
+            unboxed = node.operator.unboxed
+
+            def binOp(context):
+                lValue = left(context)
+                rValue = right(context)
+                if type(lValue) in NUMERIC and type(rValue) in NUMERIC:
+                    try:
+                        return unboxed(lValue, rValue)
+                    except ZeroDivisionError:
+                        pass
+                return applyUnboxed(node, lValue, rValue, context)
+            return binOp
+
+        if nodeType is lp.UnaryOpNode and node.opTkn.type in UNARY_SIGNS:
+            operand = self.compileUnboxed(node.node)
+
+            def sign(context):
+                return applySign(node, operand(context), context)
+            return sign
+
+        closure = self.compile(node)
+
+        def unbox(context):
+            value = closure(context)
+            if type(value) is Number:
+                return value.value
+            return value
+        return unbox
+
+    def compileBinOpNode(self, node):
+        operator = node.operator
+        if operator is not None and operator.unboxed is not None:
+            unboxed = self.compileUnboxed(node)
+
+            def boxedBinOp(context):
+                return box(unboxed(context))
+            return boxedBinOp
+
+        left = self.compile(node.lNode)
+        right = self.compile(node.rNode)
+
+        if operator is BOOL_AND:
+            def boolAnd(context):
+                lValue = left(context)
+                if lValue.isFalse():
+                    return FALSE
+                result, err = operator.apply(lValue, right(context))
+                if err:
+                    raise err.build(node, context)
+                return result
+            return boolAnd
+
+        if operator is BOOL_OR:
+            def boolOr(context):
+                lValue = left(context)
+                if lValue.isTrue():
+                    return TRUE
+                result, err = operator.apply(lValue, right(context))
+                if err:
+                    raise err.build(node, context)
+                return result
+            return boolOr
+
+        if operator is None:
+            return self.compileFallback(node)
+        apply = operator.apply
+
+        def binOp(context):
+            result, err = apply(left(context), right(context))
+            if err:
+                raise err.build(node, context)
+            return result
+        return binOp
+
+    def compileUnaryOpNode(self, node):
+        if node.opTkn.type in UNARY_SIGNS:
+            unboxed = self.compileUnboxed(node)
+
+            def boxedUnaryOp(context):
+                return box(unboxed(context))
+            return boxedUnaryOp
+
+        operand = self.compile(node.node)
+
+        if node.opTkn.matches(tok.TT_KEYWORD, "not"):
+            def unaryOp(context):
+                result, err = operand(context).boolNot()
+                if err:
+                    raise err.build(node, context)
+                return result
+        else:
+            unaryOp = operand
+        return unaryOp
+
+    def compileListModifNode(self, node):
+        varNameTkn = node.varNameTkn
+        varName = varNameTkn.value
+        valueClosure = self.compile(node.valueNode)
+        idxs = [(idxNode, self.compile(idxNode)) for idxNode in node.idxNodes]
+
+        def listModif(context):
+            listValue = context.symbolTable.get(varName)
+            if listValue is None:
+                raise RTError(
+                    varNameTkn.startPos, varNameTkn.endPos,
+                    f"{varName} is not defined",
+                    context
+                )
+            if not isinstance(listValue, List):
+                raise RTError(
+                    varNameTkn.startPos, varNameTkn.endPos,
+                    f"{varName} is not a list",
+                    context
+                )
+            value = valueClosure(context)
+            idxValues = [(idxNode, idxClosure(context)) for idxNode, idxClosure in idxs]
+
+            subList = None
+            subListValue = listValue
+            for idxNode, idx in idxValues:
+                if not (isinstance(idx, Number) and isinstance(idx.value, int)):
+                    raise RTError(
+                        idxNode.startPos, idxNode.endPos,
+                        "Index must be an int",
+                        context
+                    )
+                if idx.value >= len(subListValue.value) or idx.value < -len(subListValue.value):
+                    raise RTError(
+                        idxNode.startPos, idxNode.endPos,
+                        "Index out of range",
+                        context
+                    )
+                subList = subListValue
+                if type(subList) is List:
+                    subList.unshare()
+                subListValue = subList.value[idx.value]
+
+            subList.setItem(idx.value, value)
+            context.symbolTable.set(varName, listValue)
+            return listValue
+        return listModif
+
+    def compileIfNode(self, node):
+        cases = [(self.compile(cond), self.compile(expr)) for cond, expr in node.cases]
+        elseCase = self.compile(node.elseCase) if node.elseCase else None
+
+        def ifExpr(context):
+            for cond, expr in cases:
+                if cond(context).isTrue():
+                    return expr(context)
+            if elseCase:
+                return elseCase(context)
+            return NONE
+        return ifExpr
+
+    def compileSwitchNode(self, node):
+        subject = self.compile(node.subject)
+        valueType = node.valueType
+        table = node.table
+        cases = [(self.compile(cond), self.compile(expr)) for cond, expr in node.cases]
+        exprs = [expr for _, expr in cases]
+        rest = cases[node.size:]
+        elseCase = self.compile(node.elseCase) if node.elseCase else None
+
+        def switchExpr(context):
+            value = subject(context)
+            if type(value) is valueType:
+                case = table.get(value.value)
+                if case is not None:
+                    return exprs[case](context)
+                remaining = rest
+            else:
+                remaining = cases
+            for cond, expr in remaining:
+                if cond(context).isTrue():
+                    return expr(context)
+            if elseCase:
+                return elseCase(context)
+            return NONE
+        return switchExpr
+
+    def compileForNode(self, node):
+        varName = node.varNameTkn.value
+        slot = node.slot
+        startValueClosure = self.compile(node.startValueNode)
+        endValueClosure = self.compile(node.endValueNode)
+        stepValueClosure = self.compile(node.stepValueNode) if node.stepValueNode else None
+        body = self.compile(node.bodyNode)
+        elseNode = self.compile(node.elseNode) if node.elseNode else None
+        startPos, endPos = node.startPos, node.endPos
+
+        def expectInt(value, context):
+            if not isinstance(value, Number) or not isinstance(value.value, int):
+                raise RTError(
+                    startPos, endPos,
+                    "Expected int",
+                    context
+                )
+            return value.value
+
+        def forLoop(context):
+            result = NONE
+            start = expectInt(startValueClosure(context), context)
+            end = expectInt(endValueClosure(context), context)
+            step = expectInt(stepValueClosure(context), context) if stepValueClosure else 1
+
+            symbolTable = context.symbolTable
+            try:
+                if slot is None:
+                    symbols = symbolTable.symbols
+                    for i in range(start, end, step):
+                        if varName in symbols:
+                            symbols[varName] = Number(i)
+                        else:
+                            symbolTable.set(varName, Number(i))
+                        result = body(context)
+                else:
+                    slots = symbolTable.slots
+                    for i in range(start, end, step):
+                        slots[slot] = Number(i)
+                        result = body(context)
+            except BreakSignal:
+                return NONE
+
+            if elseNode:
+                result = elseNode(context)
+            return result
+        return forLoop
+
+    def compileForEachNode(self, node):
+        varName = node.varNameTkn.value
+        slot = node.slot
+        listClosure = self.compile(node.listNode)
+        body = self.compile(node.bodyNode)
+        elseNode = self.compile(node.elseNode) if node.elseNode else None
+        startPos, endPos = node.startPos, node.endPos
+
+        def forEachLoop(context):
+            result = NONE
+            listExpr = listClosure(context)
+            if not isinstance(listExpr, List) and not isinstance(listExpr, String):
+                raise RTError(
+                    startPos, endPos,
+                    "Expected list or string in for each",
+                    context
+                )
+            if isinstance(listExpr, List):
+                listExpr.unshare()
+
+            symbolTable = context.symbolTable
+            try:
+                for elem in listExpr.value:
+                    if isinstance(elem, str):
+                        elem = String(elem)
+                    if slot is None:
+                        symbolTable.set(varName, elem)
+                    else:
+                        symbolTable.slots[slot] = None if isinstance(elem, NoneValue) else elem
+                    result = body(context)
+            except BreakSignal:
+                return NONE
+
+            if elseNode:
+                result = elseNode(context)
+            return result
+        return forEachLoop
+
+    def compileWhileNode(self, node):
+        cond = self.compile(node.condNode)
+        body = self.compile(node.bodyNode)
+        elseNode = self.compile(node.elseNode) if node.elseNode else None
+
+        def whileLoop(context):
+            result = NONE
+            try:
+                while cond(context).isTrue():
+                    result = body(context)
+            except BreakSignal:
+                return NONE
+
+            if elseNode:
+                result = elseNode(context)
+            return result
+        return whileLoop
+
+    def compileBreakNode(self, node):
+        def breakLoop(context):
+            raise BreakSignal()
+        return breakLoop
+
+    def compileReturnNode(self, node):
+        expr = self.compile(node.exprNode)
+
+        def returnValue(context):
+            raise ReturnSignal(expr(context))
+        return returnValue
+
+    def compileBlockNode(self, node):
+        exprs = [self.compile(exprNode) for exprNode in node.exprNodes]
+
+        if len(exprs) == 0:
+            def block(context):
+                return NONE
+        elif len(exprs) == 1:
+            block = exprs[0]
+        else:
+            def block(context):
+                for expr in exprs:
+                    value = expr(context)
+                return value
+        return block
+
+    def compileFuncDefNode(self, node):
+        funcName = node.varNameTkn.value if node.varNameTkn else None
+        bodyNode = node.bodyNode
+        argNames = [argName.value for argName in node.argNameTkns]
+        canMod = node.canMod
+        isBuiltin = node.isBuiltin
+        layout = node.layout
+        slot = node.slot
+        bindName = node.varNameTkn is not None and funcName not in BUILTINS
+
+        def funcDef(context):
+            funcValue = Function(
+                funcName, bodyNode, argNames, canMod, isBuiltin, layout
+            ).setContext(context)
+            if slot is not None:
+                context.symbolTable.slots[slot] = funcValue
+            elif bindName:
+                context.symbolTable.set(funcName, funcValue)
+            return funcValue
+        return funcDef
+
+    def compileCallNode(self, node):
+        callee = self.compile(node.nodeToCall)
+        args = [self.compile(argNode) for argNode in node.argNodes]
+
+        def call(context):
+            valueToCall = callee(context)
+            argValues = [arg(context) for arg in args]
+            callContext = context if valueToCall.context is None else valueToCall.context
+
+            return valueToCall.execute(argValues, callContext, node, self)
+
+        def tailCall(context):
+            valueToCall = callee(context)
+            argValues = [arg(context) for arg in args]
+            callContext = context if valueToCall.context is None else valueToCall.context
+
+            raise TailCallSignal(valueToCall, argValues, callContext, node)
+        return tailCall if node.tail else call
+
+    def compileInlineCallNode(self, node):
+        callee = self.compile(node.callNode.nodeToCall)
+        expansion = self.compile(node.expansion)
+        call = self.compile(node.callNode)
+        calleeBody = node.calleeBody
+
+        def inlineCall(context):
+            valueToCall = callee(context)
+            if type(valueToCall) is Function and valueToCall.bodyNode is calleeBody:
+                try:
+                    return expansion(context)
+                except RTError:
+                    pass
+            return call(context)
+        return inlineCall
+
+    def compileAccessNode(self, node):
+        module = self.compile(node.moduleNode)
+
+        def access(context):
+            return cachedAccess(node, module(context), context)
+        return access
+
+    def compileDispNode(self, node):
+        body = self.compile(node.bodyNode)
+        end = "\n" if node.newLine else ""
+
+        def disp(context):
+            value = body(context)
+            print(value, end=end)
+            return value
+        return disp
+
+    def compileTryCatchNode(self, node):
+        tryClosure = self.compile(node.tryNode)
+        catchClosure = self.compile(node.catchNode)
+
+        def tryCatch(context):
+            try:
+                return tryClosure(context)
+            except RTError:
+                return catchClosure(context)
+        return tryCatch
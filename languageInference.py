@@ -0,0 +1,185 @@
+import os
+
+import languageParser as lp
+from values import Number, String
+
+################
+# TYPES
+################
+
+
+UNASSIGNED = "unassigned"
+
+COMPARISONS = {
+    "isEqual",
+    "isNotEqual",
+    "isLessThan",
+    "isGreaterThan",
+    "isLessThanOrEqual",
+    "isGreaterThanOrEqual",
+    "boolAnd",
+    "boolOr"
+}
+
+RESULT_TYPES = {
+    ("addedTo", Number, Number): Number,
+    ("addedTo", Number, String): Number,
+    ("addedTo", String, Number): Number,
+    ("addedTo", String, String): String,
+    ("subbedBy", Number, Number): Number,
+    ("subbedBy", String, Number): String,
+    ("subbedBy", String, String): String,
+    ("multedBy", Number, Number): Number,
+    ("multedBy", Number, String): String,
+    ("multedBy", String, Number): String,
+    ("divedBy", Number, Number): Number,
+    ("moddedBy", Number, Number): Number,
+    ("powedBy", Number, Number): Number
+}
+
+
+def join(a, b):
+    if a is UNASSIGNED:
+        return b
+    if b is UNASSIGNED or a is b:
+        return a
+    return None
+
+
+################
+# TYPE SCOPE
+################
+
+
+class TypeScope:
+    def __init__(self, argNames):
+        self.types = {}
+        self.opaque = set(argNames)
+        self.assignments = []
+        self.varAccessNodes = []
+        self.binOpNodes = []
+
+    def assign(self, name, source):
+        self.types[name] = UNASSIGNED
+        self.assignments.append((name, source))
+
+    def typeOf(self, node):
+        if isinstance(node, lp.NumberNode):
+            return Number
+        if isinstance(node, lp.StringNode):
+            return String
+        if isinstance(node, lp.VarAccessNode):
+            if node.varNameTkn.value in ("true", "false"):
+                return Number
+            if node.slot is None or node.varNameTkn.value in self.opaque:
+                return None
+            return self.types.get(node.varNameTkn.value)
+        if isinstance(node, lp.VarAssignNode):
+            return self.typeOf(node.valueNode)
+        if isinstance(node, lp.UnaryOpNode):
+            return Number
+        if isinstance(node, lp.BinOpNode) and node.operator is not None:
+            if node.operator.name in COMPARISONS:
+                return Number
+            left = self.typeOf(node.lNode)
+            right = self.typeOf(node.rNode)
+            if left is UNASSIGNED or right is UNASSIGNED:
+                return UNASSIGNED
+            return RESULT_TYPES.get((node.operator.name, left, right))
+        return None
+
+    def close(self):
+        changed = True
+        while changed:
+            changed = False
+            for name, source in self.assignments:
+                valueType = self.typeOf(source) if lp.isNode(source) else source
+                joined = join(self.types[name], valueType)
+                if joined is not self.types[name]:
+                    self.types[name] = joined
+                    changed = True
+
+        for name, valueType in self.types.items():
+            if valueType is UNASSIGNED:
+                self.types[name] = None
+
+        for node in self.varAccessNodes:
+            node.valueType = self.typeOf(node)
+        for node in self.binOpNodes:
+            left = self.typeOf(node.lNode)
+            right = self.typeOf(node.rNode)
+            if left is not None and right is not None:
+                node.operandTypes = (left, right)
+
+
+################
+# TYPE INFERRER
+################
+
+
+class TypeInferrer:
+    def infer(self, node, scope=None):
+        method = getattr(self, f"infer{type(node).__name__}", self.inferChildren)
+        method(node, scope)
+
+    def inferChildren(self, node, scope):
+        for _, value in node.fields():
+            self.inferValue(value, scope)
+
+    def inferValue(self, value, scope):
+        if isinstance(value, (list, tuple)):
+            for element in value:
+                self.inferValue(element, scope)
+        elif lp.isNode(value):
+            self.infer(value, scope)
+
+    def inferVarAccessNode(self, node, scope):
+        if scope and node.slot is not None:
+            scope.varAccessNodes.append(node)
+
+    def inferVarAssignNode(self, node, scope):
+        if scope and node.slot is not None:
+            scope.assign(node.varNameTkn.value, node.valueNode)
+        self.infer(node.valueNode, scope)
+
+    def inferBinOpNode(self, node, scope):
+        if scope:
+            scope.binOpNodes.append(node)
+        self.inferChildren(node, scope)
+
+    def inferListModifNode(self, node, scope):
+        if scope:
+            scope.opaque.add(node.varNameTkn.value)
+        self.inferChildren(node, scope)
+
+    def inferForNode(self, node, scope):
+        if scope and node.slot is not None:
+            scope.assign(node.varNameTkn.value, Number)
+        self.inferChildren(node, scope)
+
+    def inferForEachNode(self, node, scope):
+        if scope:
+            scope.opaque.add(node.varNameTkn.value)
+        self.inferChildren(node, scope)
+
+    def inferIncludeNode(self, node, scope):
+        if scope and node.moduleName:
+            scope.opaque.add(node.moduleName)
+        elif scope and isinstance(node.fileNode, lp.StringNode):
+            scope.opaque.add(os.path.basename(node.fileNode.tkn.value))
+        self.infer(node.fileNode, scope)
+
+    def inferClassNode(self, node, scope):
+        if scope:
+            scope.opaque.add(node.varNameTkn.value)
+        self.infer(node.bodyNode)
+
+    def inferFuncDefNode(self, node, scope):
+        if scope and node.varNameTkn:
+            scope.opaque.add(node.varNameTkn.value)
+        if node.layout is None:
+            self.infer(node.bodyNode)
+        else:
+            bodyScope = TypeScope([argNameTkn.value for argNameTkn in node.argNameTkns])
+            self.infer(node.bodyNode, bodyScope)
+            bodyScope.close()
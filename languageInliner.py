@@ -0,0 +1,182 @@
+import languageParser as lp
+from languageOptimizer import Optimizer
+from values import BOOL_AND, BOOL_OR
+
+################
+# INLINING RULES
+################
+
+
+MAX_INLINED_NODES = 16
+MAX_DUPLICATED_ARG = 3
+
+PURE_NODES = (lp.NumberNode, lp.StringNode, lp.VarAccessNode, lp.BinOpNode, lp.UnaryOpNode, lp.ListNode, lp.IfNode)
+SIMPLE_NODES = (lp.NumberNode, lp.StringNode, lp.VarAccessNode)
+CONSTANT_NAMES = ("true", "false", "none")
+
+inlineLog = []
+
+
+def childNodes(node):
+    for _, value in node.fields():
+        yield from flatten(value)
+
+
+def flatten(value):
+    if isinstance(value, (list, tuple)):
+        for element in value:
+            yield from flatten(element)
+    elif lp.isNode(value):
+        yield value
+
+
+def unwrap(node):
+    while isinstance(node, lp.BlockNode) and len(node.exprNodes) == 1:
+        node = node.exprNodes[0]
+    return node
+
+
+def pureSize(node):
+    if not isinstance(node, PURE_NODES) or isinstance(node, lp.BinOpNode) and node.operator is None:
+        return None
+    total = 1
+    for child in childNodes(node):
+        size = pureSize(child)
+        if size is None:
+            return None
+        total += size
+    return total
+
+
+def names(node):
+    if isinstance(node, lp.VarAccessNode):
+        return [node.varNameTkn.value]
+    return [name for child in childNodes(node) for name in names(child)]
+
+
+def strictNames(node):
+    if isinstance(node, lp.VarAccessNode):
+        return [node.varNameTkn.value]
+    if isinstance(node, lp.IfNode):
+        return strictNames(node.cases[0][0])
+    if isinstance(node, lp.BinOpNode) and (node.operator is BOOL_AND or node.operator is BOOL_OR):
+        return strictNames(node.lNode)
+    return [name for child in childNodes(node) for name in strictNames(child)]
+
+
+def where(node):
+    return f"{node.startPos.fn}, line {node.startPos.ln + 1}"
+
+
+################
+# INLINER
+################
+
+
+class Inliner:
+    def __init__(self):
+        self.functions = {}
+
+    def inline(self, node):
+        if isinstance(node, lp.BlockNode):
+            self.collect(node.exprNodes)
+        if len(self.functions) == 0:
+            return node
+        return self.rewrite(node)
+
+    def collect(self, exprNodes):
+        definitions = {}
+        for exprNode in exprNodes:
+            if isinstance(exprNode, lp.FuncDefNode) and exprNode.varNameTkn:
+                name = exprNode.varNameTkn.value
+                definitions[name] = None if name in definitions else exprNode
+            elif isinstance(exprNode, lp.VarAssignNode):
+                definitions[exprNode.varNameTkn.value] = None
+
+        for name, funcDef in definitions.items():
+            if funcDef is not None and self.isInlinable(funcDef):
+                self.functions[name] = funcDef
+                inlineLog.append(f"candidate {name} ({where(funcDef)})")
+
+    def isInlinable(self, funcDef):
+        if funcDef.canMod:
+            return False
+        params = [argNameTkn.value for argNameTkn in funcDef.argNameTkns]
+        if len(set(params)) != len(params) or any(param in CONSTANT_NAMES for param in params):
+            return False
+        body = unwrap(funcDef.bodyNode)
+        size = pureSize(body)
+        if size is None or size > MAX_INLINED_NODES:
+            return False
+        return all(name in params or name in CONSTANT_NAMES for name in names(body))
+
+    def rewrite(self, node):
+        for name, value in node.fields():
+            setattr(node, name, self.rewriteValue(value))
+        if type(node) is lp.CallNode:
+            return self.inlineCall(node)
+        return node
+
+    def rewriteValue(self, value):
+        if isinstance(value, list):
+            return [self.rewriteValue(element) for element in value]
+        if isinstance(value, tuple):
+            return tuple(self.rewriteValue(element) for element in value)
+        if lp.isNode(value):
+            return self.rewrite(value)
+        return value
+
+    def inlineCall(self, node):
+        if not isinstance(node.nodeToCall, lp.VarAccessNode):
+            return node
+        name = node.nodeToCall.varNameTkn.value
+        funcDef = self.functions.get(name)
+        if funcDef is None:
+            return node
+
+        params = [argNameTkn.value for argNameTkn in funcDef.argNameTkns]
+        reason = self.rejection(funcDef, params, node.argNodes)
+        if reason:
+            inlineLog.append(f"kept call to {name} ({where(node)}): {reason}")
+            return node
+
+        body = unwrap(funcDef.bodyNode)
+        expansion = Optimizer().optimize(self.clone(body, dict(zip(params, node.argNodes))))
+        inlineLog.append(f"inlined {name} ({where(node)})")
+        return lp.InlineCallNode(node, expansion, funcDef.bodyNode)
+
+    def rejection(self, funcDef, params, argNodes):
+        if len(argNodes) != len(params):
+            return "wrong number of arguments"
+
+        body = unwrap(funcDef.bodyNode)
+        uses = names(body)
+        strict = strictNames(body)
+        for param, argNode in zip(params, argNodes):
+            size = pureSize(argNode)
+            if size is None:
+                return f"argument {param} is not a pure expression"
+            if isinstance(argNode, SIMPLE_NODES):
+                continue
+            if param not in strict:
+                return f"argument {param} might not be evaluated"
+            if uses.count(param) > 1 and size > MAX_DUPLICATED_ARG:
+                return f"argument {param} would be evaluated {uses.count(param)} times"
+        return None
+
+    def clone(self, value, args):
+        if isinstance(value, list):
+            return [self.clone(element, args) for element in value]
+        if isinstance(value, tuple):
+            return tuple(self.clone(element, args) for element in value)
+        if not lp.isNode(value):
+            return value
+        if isinstance(value, lp.VarAccessNode) and value.varNameTkn.value in args:
+            return self.clone(args[value.varNameTkn.value], {})
+
+        copy = object.__new__(lp.IfNode if isinstance(value, lp.SwitchNode) else type(value))
+        copy.startPos = value.startPos
+        copy.endPos = value.endPos
+        for name, field in value.fields():
+            setattr(copy, name, self.clone(field, args))
+        return copy
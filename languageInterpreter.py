@@ -14,7 +14,7 @@ else:
 
 from error import RTError
 import tokens as tok
-from values import NoneValue, Number, String, Function, ReturnValue, List, Module, Class, BreakValue
+from values import NoneValue, Number, String, Function, List, Module, Class, TRUE, FALSE, NONE, BOOL_AND, BOOL_OR, OPERATORS, STRINGS, boolean, box
 import languageParser as lp
 from languageLexer import Token, DIGITS
 import language
@@ -99,27 +99,25 @@ KB = KBHit()
 
 
 ################
-# RUNTIME RESULT
+# CONTROL FLOW
 ################
 
 
-class RTResult:
-    def __init__(self):
-        self.value = None
-        self.err = None
+class BreakSignal(Exception):
+    pass
 
-    def register(self, res):
-        if res.err:
-            self.err = res.err
-        return res.value
 
-    def success(self, value):
+class ReturnSignal(Exception):
+    def __init__(self, value):
         self.value = value
-        return self
 
-    def failure(self, err):
-        self.err = err
-        return self
+
+class TailCallSignal(Exception):
+    def __init__(self, valueToCall, args, context, node):
+        self.valueToCall = valueToCall
+        self.args = args
+        self.context = context
+        self.node = node
 
 
 ################
@@ -133,11 +131,17 @@ class Context:
         self.parent = parent
         self.parentEntryPos = parentEntryPos
         self.symbolTable = None
-    
-    def depth(self):
-        if self.parent == None:
-            return 1
-        return 1 + self.parent.depth()
+
+    def enter(self, parent, parentEntryPos):
+        self.parent = parent
+        self.parentEntryPos = parentEntryPos
+        self.symbolTable.parent = parent.symbolTable
+
+    def leave(self):
+        self.parent = None
+        self.parentEntryPos = None
+        self.symbolTable.parent = None
+        self.symbolTable.clear()
     
     def copy(self):
         res = Context(self.displayName, self.parent.copy() if self.parent else None, self.parentEntryPos.copy() if self.parentEntryPos else None)
@@ -157,6 +161,7 @@ class SymbolTable:
     def __init__(self, parent=None):
         self.symbols = {}
         self.parent = parent
+        self.version = 0
 
     def get(self, name):
         value = self.symbols.get(name, None)
@@ -164,18 +169,30 @@ class SymbolTable:
             return self.parent.get(name)
         return value
 
+    def lookup(self, name, tables):
+        tables.append(self)
+        value = self.symbols.get(name, None)
+        if value is None and self.parent:
+            return self.parent.lookup(name, tables)
+        return value
+
     def set(self, name, value):
         if isinstance(value, NoneValue):
             if name in self.symbols:
                 del self.symbols[name]
+                self.version += 1
         else:
+            if name not in self.symbols:
+                self.version += 1
             self.symbols[name] = value
 
     def remove(self, name):
         del self.symbols[name]
+        self.version += 1
     
     def clear(self):
         self.symbols.clear()
+        self.version += 1
     
     def copy(self):
         res = SymbolTable(self.parent.copy() if self.parent else None)
@@ -189,6 +206,170 @@ class SymbolTable:
         return res
 
 
+class SlotSymbolTable(SymbolTable):
+    def __init__(self, layout, parent=None):
+        super().__init__(parent)
+        self.layout = layout
+        self.slots = [None] * len(layout)
+
+    def get(self, name):
+        slot = self.layout.get(name)
+        if slot is None:
+            return super().get(name)
+        value = self.slots[slot]
+        if value is None and self.parent:
+            return self.parent.get(name)
+        return value
+
+    def lookup(self, name, tables):
+        tables.append(self)
+        return self.get(name)
+
+    def set(self, name, value):
+        slot = self.layout.get(name)
+        if slot is None:
+            super().set(name, value)
+        elif isinstance(value, NoneValue):
+            self.slots[slot] = None
+        else:
+            self.slots[slot] = value
+
+    def remove(self, name):
+        slot = self.layout.get(name)
+        if slot is None:
+            super().remove(name)
+        elif self.slots[slot] is None:
+            raise KeyError(name)
+        else:
+            self.slots[slot] = None
+
+    def clear(self):
+        super().clear()
+        self.slots = [None] * len(self.layout)
+
+    def copy(self):
+        res = SlotSymbolTable(self.layout, self.parent.copy() if self.parent else None)
+        res.symbols, res.slots = deepcopy((self.symbols, self.slots))
+        return res
+
+    def __repr__(self):
+        symbols = {name: self.slots[slot] for name, slot in self.layout.items() if self.slots[slot] is not None}
+        symbols.update(self.symbols)
+        res = repr(symbols)
+        if self.parent:
+            res += "\n" + repr(self.parent)
+        return res
+
+
+################
+# ACCESS CACHE
+################
+
+
+class AccessCache:
+    def __init__(self, target, name, tables):
+        self.target = target
+        self.name = name
+        self.holder = tables[-1]
+        self.stamps = [(table, table.version, table.parent) for table in tables]
+
+    def get(self, target):
+        if target is not self.target:
+            return None
+        for table, version, parent in self.stamps:
+            if table.version != version or table.parent is not parent:
+                return None
+        return self.holder.symbols.get(self.name)
+
+
+def cachedAccess(node, target, context):
+    cache = node.cache
+    if cache is not None:
+        value = cache.get(target)
+        if value is not None:
+            return value
+
+    tables = []
+    value = target.lookup(node.varNameTkn.value, tables)
+    if value is None:
+        value, err = target.access(node, context)
+        if err:
+            raise err
+        return value
+
+    if not any(isinstance(table, SlotSymbolTable) for table in tables):
+        node.cache = AccessCache(target, node.varNameTkn.value, tables)
+    return value
+
+
+def cachedLookup(node, symbolTable):
+    name = node.varNameTkn.value
+    while type(symbolTable) is SlotSymbolTable:
+        slot = symbolTable.layout.get(name)
+        value = symbolTable.symbols.get(name) if slot is None else symbolTable.slots[slot]
+        if value is not None:
+            return value
+        symbolTable = symbolTable.parent
+    if symbolTable is None:
+        return None
+
+    value = symbolTable.symbols.get(name)
+    if value is not None:
+        return value
+    cache = node.cache
+    if cache is not None:
+        value = cache.get(symbolTable)
+        if value is not None:
+            return value
+
+    tables = []
+    value = symbolTable.lookup(name, tables)
+    if value is not None and not any(isinstance(table, SlotSymbolTable) for table in tables):
+        node.cache = AccessCache(symbolTable, name, tables)
+    return value
+
+
+################
+# UNBOXED ARITHMETIC
+################
+
+
+NUMERIC = (int, float)
+UNARY_SIGNS = {
+    tok.TT_PLUS: OPERATORS["addedTo"],
+    tok.TT_MINUS: OPERATORS["subbedBy"]
+}
+
+
+def applyUnboxed(node, left, right, context):
+    if type(left) in NUMERIC and type(right) in NUMERIC:
+        try:
+            return node.operator.unboxed(left, right)
+        except ZeroDivisionError:
+            pass
+    result, err = node.operator.apply(box(left), box(right))
+    if err:
+        raise err.build(node, context)
+    return result
+
+
+def applyTyped(node, left, right, context):
+    result, err = node.operator.specialize(*node.operandTypes)(left, right)
+    if err:
+        raise err.build(node, context)
+    return result
+
+
+def applySign(node, value, context):
+    operator = UNARY_SIGNS[node.opTkn.type]
+    if type(value) in NUMERIC:
+        return operator.unboxed(0, value)
+    result, err = operator.apply(Number(0), box(value))
+    if err:
+        raise err.build(node, context)
+    return result
+
+
 ################
 # INTERPRETER
 ################
@@ -203,62 +384,124 @@ BUILTINS = [
 ]
 
 
+QUICKEN_THRESHOLD = 8
+TIER_UP_CALLS = 100
+TIER_UP_ITERATIONS = 1000
+HOT_ENGINE = "closure"
+
+tierLog = []
+
+
 class Interpreter:
-    def __init__(self, dev):
+    engine = "interpreter"
+    quickening = True
+    tiering = True
+    dispatch = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.dispatch = {}
+
+    def __init__(self, dev, optimize=True):
         self.dev = dev
+        self.optimize = optimize
+        self.quicken = optimize and self.quickening
+        self.tier = optimize and self.tiering
+        self.hotTier = None
     
     def visit(self, node, context):
-        methodName = f"visit{type(node).__name__}"
-        method = getattr(self, methodName, self.noVisitMethod)
-        return method(node, context)
+        method = self.dispatch.get(type(node))
+        if method is None:
+            method = self.dispatchMethod(type(node))
+        return method(self, node, context)
+
+    def dispatchMethod(self, nodeType):
+        method = getattr(type(self), f"visit{nodeType.__name__}", type(self).noVisitMethod)
+        self.dispatch[nodeType] = method
+        return method
 
     def noVisitMethod(self, node, context):
         raise Exception(f"No visit{type(node).__name__} method defined")
+
+    def observe(self, node, seen, quickType):
+        if seen is not node.quick:
+            node.quick = seen
+            node.hits = 0
+        elif seen is not None:
+            node.hits += 1
+            if node.hits >= QUICKEN_THRESHOLD:
+                node.__class__ = quickType
+
+    def deoptimize(self, node):
+        node.__class__ = node.generic
+        node.hits = 0
+
+    def compiledTier(self):
+        if self.hotTier is None:
+            self.hotTier = language.ENGINES[HOT_ENGINE](self.dev, self.optimize)
+        return self.hotTier.visit
+
+    def tierUp(self, node, name, after):
+        tierLog.append(f"{name} ({node.startPos.fn}, line {node.startPos.ln + 1}) after {after}")
+        return self.compiledTier()
+
+    def loopTier(self, node):
+        if not self.tier:
+            return self.visit, False
+        if node.hits < TIER_UP_ITERATIONS:
+            return self.visit, True
+        return self.compiledTier(), False
+
+    def visitBody(self, function, context):
+        bodyNode = function.bodyNode
+        if self.tier:
+            closure = getattr(bodyNode, "closure", None)
+            if closure is not None:
+                return closure(context)
+            function.calls += 1
+            if function.calls >= TIER_UP_CALLS:
+                visit = self.tierUp(bodyNode, f"function {function.name}", f"{function.calls} calls")
+                return visit(bodyNode, context)
+        return self.visit(bodyNode, context)
     
     def visitClassNode(self, node, context):
-        res = RTResult()
-        
         className = node.varNameTkn.value
         if node.parentTkn:
             parent = context.symbolTable.get(node.parentTkn.value)
             if not isinstance(parent, Class):
-                return res.failure(RTError(
+                raise RTError(
                     node.parentTkn.startPos, node.parentTkn.endPos,
                     "Class parent must be a defined class",
                     context
-                ))
-            newContext = Context(className, parent.context, parent.startPos)
+                )
+            newContext = Context(className, parent.context, node.startPos)
             newContext.symbolTable = SymbolTable(parent.context.symbolTable)
         else:
             parent = None
             newContext = Context(className)
             newContext.symbolTable = SymbolTable()
-        
+
         bodyNode = node.bodyNode
-        
+
         classValue = Class(
             className, parent, bodyNode, newContext
-        ).setContext(context).setPos(node.startPos, node.endPos)
-        classValue.initContext()  # type: ignore
+        ).setContext(context)
+        classValue.initContext(self)  # type: ignore
 
         if className not in BUILTINS:
             context.symbolTable.set(className, classValue)
-        
-        return res.success(classValue)
-    
+
+        return classValue
+
     def visitIncludeNode(self, node, context):
-        res = RTResult()
-        
         dir = os.path.normpath(os.path.dirname(node.startPos.fn))
-        fStr = res.register(self.visit(node.fileNode, context))
-        if res.err:
-            return res
+        fStr = self.visit(node.fileNode, context)
         if not isinstance(fStr, String):
-            return res.failure(RTError(
+            raise RTError(
                 node.startPos, node.endPos,
                 "Expected string after expression evaluation",
                 context
-            ))
+            )
         fn = os.path.normpath(dir + "/" + fStr.value + ".ble")
         if node.moduleName:
             moduleName = node.moduleName
@@ -275,606 +518,552 @@ class Interpreter:
                 libDir = str(pathlib.Path.home()) + "/ble/ble-master/lib/"
             fn = os.path.normpath(libDir + fStr.value + ".ble")
             if not os.path.isfile(fn):
-                return res.failure(RTError(
+                raise RTError(
                     node.startPos, node.endPos,
                     f"File '{fn}' not found",
                     context
-                ))
-        
+                )
+
         if fn in node.startPos.module.split(" -> "):
             module = context.symbolTable.get(moduleName)
             if moduleName not in BUILTINS:
                 context.symbolTable.set(moduleName,module)
-            return res.success(moduleName)
-        
+            return moduleName
+
         moduleContext = Context(moduleName, context, node.startPos)
         moduleContext.symbolTable = SymbolTable(context.symbolTable)
-        module = Module(moduleContext).setContext(context).setPos(node.startPos, node.endPos)
+        module = Module(moduleContext).setContext(context)
         if moduleName not in BUILTINS:
             context.symbolTable.set(moduleName,module)
         with open(fn) as f:
-            _, err = language.run(fn, f.read(), f"{node.startPos.module} -> {fn}", moduleContext)
+            _, err = language.run(fn, f.read(), f"{node.startPos.module} -> {fn}", moduleContext, engine=self.engine, optimize=self.optimize)
         if err:
-            return res.failure(err)
+            raise err
         moduleContext.parent = None
         moduleContext.parentEntryPos = None
         moduleContext.symbolTable.parent = None
-        return res.success(module)
-    
+        return module
+
     def visitAccessNode(self, node, context):
-        res = RTResult()
-        
-        module = res.register(self.visit(node.moduleNode, context))
-        if res.err:
-            return res
-        value, err = module.access(node.varNameTkn)
-        if err:
-            return res.failure(err)
-        
-        return res.success(value)
-    
+        module = self.visit(node.moduleNode, context)
+        value = cachedAccess(node, module, context)
+        if self.quicken and node.cache is not None:
+            node.hits += 1
+            if node.hits >= QUICKEN_THRESHOLD:
+                node.__class__ = lp.CachedAccessNode
+        return value
+
+    def visitCachedAccessNode(self, node, context):
+        module = self.visit(node.moduleNode, context)
+        value = node.cache.get(module)
+        if value is None:
+            self.deoptimize(node)
+            return cachedAccess(node, module, context)
+        return value
+
     def visitTypeNode(self, node, context):
-        res = RTResult()
-        
-        value = res.register(self.visit(node.valueNode, context))
-        if res.err:
-            return res
-        
+        value = self.visit(node.valueNode, context)
+
         if isinstance(value, Number) and isinstance(value.value, int):
-            return res.success(String("int"))
+            return String("int")
         if isinstance(value, Number) and isinstance(value.value, float):
-            return res.success(String("float"))
+            return String("float")
         if isinstance(value, String):
-            return res.success(String("string"))
+            return String("string")
         if isinstance(value, List):
-            return res.success(String("list"))
+            return String("list")
         if isinstance(value, Function):
-            return res.success(String("function"))
+            return String("function")
         if isinstance(value, NoneValue):
-            return res.success(String("none"))
+            return String("none")
         if isinstance(value, Module):
-            return res.success(String("module"))
+            return String("module")
         if isinstance(value, Class):
-            return res.success(String("class"))
-        
+            return String("class")
+
         raise Exception("Type recognition not implemented")
-    
+
+    def constant(self, node, valueType, *args):
+        if node.constant is None:
+            node.constant = valueType(*args)
+        return node.constant
+
     def visitNumberNode(self, node, context):
-        return RTResult().success(
-            Number(node.tkn.value).setContext(context).setPos(
-                node.startPos, node.endPos
-            )
-        )
-    
+        return self.constant(node, Number, node.tkn.value)
+
     def visitNoneValueNode(self, node, context):
-        return RTResult().success(
-            NoneValue().setContext(context).setPos(
-                node.startPos, node.endPos
-            )
-        )
+        return NONE
 
     def visitStringNode(self, node, context):
-        return RTResult().success(
-            String(node.tkn.value).setContext(context).setPos(
-                node.startPos, node.endPos
-            )
-        )
-    
+        return self.constant(node, String, node.tkn.value)
+
     def visitListNode(self, node, context):
-        res = RTResult()
-        value = []
-        for exprNode in node.exprNodes:
-            value.append(res.register(self.visit(exprNode, context)))
-            if res.err:
-                return res
-        return res.success(
-            List(value).setContext(context).setPos(
-                node.startPos, node.endPos
-            )
-        )
-    
+        value = [self.visit(exprNode, context) for exprNode in node.exprNodes]
+        return List(value)
+
     def visitVarAccessNode(self, node, context):
-        res = RTResult()
         varName = node.varNameTkn.value
         if varName in BUILTINS:
             if varName == "true":
-                value = Number(1).setContext(context).setPos(
-                    node.startPos, node.endPos
-                )
+                value = TRUE
             elif varName == "false":
-                value = Number(0).setContext(context).setPos(
-                    node.startPos, node.endPos
-                )
+                value = FALSE
             elif varName == "none":
-                value = NoneValue().setContext(context).setPos(
-                    node.startPos, node.endPos
-                )
+                value = NONE
             elif varName == "module":
-                value = String(node.startPos.module).setContext(context).setPos(
-                    node.startPos, node.endPos
-                )
+                value = String(node.startPos.module)
             elif varName == "argv":
-                value = List([String(arg) for arg in sys.argv[1:]]).setContext(context).setPos(
-                    node.startPos, node.endPos
-                )
+                value = List([String(arg) for arg in sys.argv[1:]])
             else:
                 value = None
+        elif node.slot is None:
+            value = cachedLookup(node, context.symbolTable)
         else:
-            value = context.symbolTable.get(varName)
+            value = context.symbolTable.slots[node.slot]
+            if value is None:
+                value = cachedLookup(node, context.symbolTable.parent)
         if value is None:
-            return res.success(NoneValue().setContext(context).setPos(node.startPos, node.endPos))
-        value.setPos(node.startPos, node.endPos)
-
-        return res.success(value)
+            return NONE
+        return value
 
     def visitVarAssignNode(self, node, context):
-        res = RTResult()
         varName = node.varNameTkn.value
-        value = res.register(self.visit(node.valueNode, context))
-        if res.err:
-            return res
+        value = self.visit(node.valueNode, context)
 
-        if varName not in BUILTINS:
+        if node.slot is not None:
+            context.symbolTable.slots[node.slot] = None if isinstance(value, NoneValue) else value
+        elif varName not in BUILTINS:
             context.symbolTable.set(varName, value)
-        return res.success(value)
-    
+        return value
+
+    def visitUnboxed(self, node, context):
+        nodeType = type(node)
+        if nodeType is lp.NumberNode:
+            return node.tkn.value
+        if nodeType is lp.VarAccessNode and node.valueType is Number:
+            value = context.symbolTable.slots[node.slot]
+            if type(value) is Number:
+                return value.value
+        elif nodeType is lp.NumberBinOpNode:
+            left = self.visitUnboxed(node.lNode, context)
+            right = self.visitUnboxed(node.rNode, context)
+            if type(left) in NUMERIC and type(right) in NUMERIC:
+                try:
+                    return node.operator.unboxed(left, right)
+                except ZeroDivisionError:
+                    pass
+            else:
+                self.deoptimize(node)
+            return applyUnboxed(node, left, right, context)
+        elif nodeType is lp.BinOpNode and node.operator is not None and node.operator.unboxed is not None:
+            left = self.visitUnboxed(node.lNode, context)
+            right = self.visitUnboxed(node.rNode, context)
+            if self.quicken:
+                if type(left) in NUMERIC and type(right) in NUMERIC:
+                    self.observe(node, lp.NumberBinOpNode, lp.NumberBinOpNode)
+                elif type(left) is String and type(right) is String:
+                    self.observe(node, lp.StringBinOpNode, lp.StringBinOpNode)
+                else:
+                    self.observe(node, None, None)
+            if node.operandTypes == STRINGS and type(left) is String and type(right) is String:
+                return applyTyped(node, left, right, context)
+            return applyUnboxed(node, left, right, context)
+        elif nodeType is lp.UnaryOpNode and node.opTkn.type in UNARY_SIGNS:
+            return applySign(node, self.visitUnboxed(node.node, context), context)
+
+        value = self.visit(node, context)
+        if type(value) is Number:
+            return value.value
+        return value
+
     def visitBinOpNode(self, node, context):
-        res = RTResult()
+        operator = node.operator
+        if operator is not None and operator.unboxed is not None:
+            return box(self.visitUnboxed(node, context))
 
-        left = res.register(self.visit(node.lNode, context))
-        if res.err:
-            return res
-        
-        if node.opTkn.matches(tok.TT_KEYWORD, "and") and left.isFalse():
-            return res.success(Number(0).setContext(left.context).setPos(node.startPos, node.endPos))
-        if node.opTkn.matches(tok.TT_KEYWORD, "or") and left.isTrue():
-            return res.success(Number(1).setContext(left.context).setPos(node.startPos, node.endPos))
-        
-        right = res.register(self.visit(node.rNode, context))
-        if res.err:
-            return res
+        left = self.visit(node.lNode, context)
 
-        err = None
-        if node.opTkn.type == tok.TT_PLUS:
-            result, err = left.addedTo(right)
-        elif node.opTkn.type == tok.TT_MINUS:
-            result, err = left.subbedBy(right)
-        elif node.opTkn.type == tok.TT_MUL:
-            result, err = left.multedBy(right)
-        elif node.opTkn.type == tok.TT_DIV:
-            result, err = left.divedBy(right)
-        elif node.opTkn.type == tok.TT_MOD:
-            result, err = left.moddedBy(right)
-        elif node.opTkn.type == tok.TT_POW:
-            result, err = left.powedBy(right)
-        elif node.opTkn.type == tok.TT_EE:
-            result, err = left.isEqual(right)
-        elif node.opTkn.type == tok.TT_NE:
-            result, err = left.isNotEqual(right)
-        elif node.opTkn.type == tok.TT_LT:
-            result, err = left.isLessThan(right)
-        elif node.opTkn.type == tok.TT_GT:
-            result, err = left.isGreaterThan(right)
-        elif node.opTkn.type == tok.TT_LTE:
-            result, err = left.isLessThanOrEqual(right)
-        elif node.opTkn.type == tok.TT_GTE:
-            result, err = left.isGreaterThanOrEqual(right)
-        elif node.opTkn.matches(tok.TT_KEYWORD, "and"):
-            result, err = left.boolAnd(right)
-        elif node.opTkn.matches(tok.TT_KEYWORD, "or"):
-            result, err = left.boolOr(right)
-        else:
-            result, err = None, RTError(node.startPos, node.endPos,
-                                        "Unrecognized operation"
-                                        , context)
+        if operator is BOOL_AND and left.isFalse():
+            return FALSE
+        if operator is BOOL_OR and left.isTrue():
+            return TRUE
+
+        right = self.visit(node.rNode, context)
 
+        if operator is None:
+            raise RTError(
+                node.startPos, node.endPos,
+                "Unrecognized operation",
+                context
+            )
+        result, err = operator.apply(left, right)
         if err:
-            return res.failure(err)
-        return res.success(result.setPos(node.startPos, node.endPos))
+            raise err.build(node, context)
+        return result
+
+    def visitNumberBinOpNode(self, node, context):
+        return box(self.visitUnboxed(node, context))
+
+    def visitStringBinOpNode(self, node, context):
+        left = self.visit(node.lNode, context)
+        right = self.visit(node.rNode, context)
+        if type(left) is String and type(right) is String:
+            result, err = node.operator.specialize(String, String)(left, right)
+            if err:
+                raise err.build(node, context)
+            return result
+        self.deoptimize(node)
+        return box(applyUnboxed(node, left, right, context))
 
     def visitUnaryOpNode(self, node, context):
-        res = RTResult()
+        if node.opTkn.type in UNARY_SIGNS:
+            return box(self.visitUnboxed(node, context))
 
-        val = res.register(self.visit(node.node, context))
-        if res.err:
-            return res
+        val = self.visit(node.node, context)
 
         result = val
         err = None
-        if node.opTkn.type == tok.TT_MINUS:
-            result, err = Number(0).setContext(context).setPos(
-                node.opTkn.startPos, node.opTkn.endPos).subbedBy(val)
-        elif node.opTkn.type == tok.TT_PLUS:
-            result, err = Number(0).setContext(context).setPos(
-                node.opTkn.startPos, node.opTkn.endPos).addedTo(val)
-        elif node.opTkn.matches(tok.TT_KEYWORD, "not"):
+        if node.opTkn.matches(tok.TT_KEYWORD, "not"):
             result, err = val.boolNot()
 
         if err:
-            return res.failure(err)
-        return res.success(result.setPos(node.startPos, node.endPos))
-    
+            raise err.build(node, context)
+        return result
+
     def visitListModifNode(self, node, context):
-        res = RTResult()
-        
         varName = node.varNameTkn.value
         listValue = context.symbolTable.get(varName)
         if listValue is None:
-            return res.failure(RTError(
+            raise RTError(
                 node.varNameTkn.startPos, node.varNameTkn.endPos,
                 f"{varName} is not defined",
                 context
-            ))
+            )
         if not isinstance(listValue, List):
-            return res.failure(RTError(
+            raise RTError(
                 node.varNameTkn.startPos, node.varNameTkn.endPos,
                 f"{varName} is not a list",
                 context
-            ))
-        listValue.setContext(context).setPos(node.startPos, node.endPos)
+            )
         subListValue = listValue
         subList = None
-        
-        value = res.register(self.visit(node.valueNode, context))
-        if res.err:
-            return res
-        
-        idxs = [res.register(self.visit(node.idxNode, context)) for node.idxNode in node.idxNodes]
+
+        value = self.visit(node.valueNode, context)
+
+        idxs = [self.visit(node.idxNode, context) for node.idxNode in node.idxNodes]
         if len(idxs) == 0:
-            res.failure(RTError(
+            raise RTError(
                 node.startPos, node.endPos,
                 "no indices given",
                 context
-            ))
-        if res.err:
-            return res
+            )
         idx = idxs[0]
         for idx in idxs:
             if not (isinstance(idx, Number) and isinstance(idx.value, int)):
-                return res.failure(RTError(
+                raise RTError(
                     node.idxNode.startPos, node.idxNode.endPos,
                     "Index must be an int",
                     context
-                ))
+                )
             if idx.value >= len(subListValue.value) or idx.value < -len(subListValue.value):
-                return res.failure(RTError(
+                raise RTError(
                     node.idxNode.startPos, node.idxNode.endPos,
                     "Index out of range",
                     context
-                ))
+                )
             subList = subListValue
-            subListValue = subListValue.value[idx.value]
-        
+            if type(subList) is List:
+                subList.unshare()
+            subListValue = subList.value[idx.value]
+
         if subList:
-            subList.value[idx.value] = value.copy()
+            subList.setItem(idx.value, value)
         else:
             subListValue.value = value.value
         context.symbolTable.set(varName, listValue)
-        return res.success(listValue)
-
-    def visitIfNode(self, node, context):
-        res = RTResult()
+        return listValue
 
-        for cond, expr in node.cases:
-            condValue = res.register(self.visit(cond, context))
-            if res.err:
-                return res
-
-            if condValue.isTrue():
-                exprValue = res.register(self.visit(expr, context))
-                if res.err:
-                    return res
-                return res.success(exprValue)
+    def visitIfNode(self, node, context, start=0):
+        cases = node.cases
+        for i in range(start, len(cases)):
+            cond, expr = cases[i]
+            if self.visit(cond, context).isTrue():
+                return self.visit(expr, context)
 
         if node.elseCase:
-            elseValue = res.register(self.visit(node.elseCase, context))
-            if res.err:
-                return res
-            return res.success(elseValue)
-
-        return res.success(NoneValue().setContext(context).setPos(node.startPos, node.endPos))
-
-    def visitForNode(self, node, context):
-        res = RTResult()
-        
-        result = NoneValue().setContext(context).setPos(node.startPos, node.endPos)
-
-        startValue = res.register(self.visit(node.startValueNode, context))
-        if res.err:
-            return res
-        if not isinstance(startValue, Number) or not isinstance(startValue.value, int):
-            return res.failure(RTError(
+            return self.visit(node.elseCase, context)
+
+        return NONE
+
+    def visitSwitchNode(self, node, context):
+        value = self.visit(node.subject, context)
+        if type(value) is not node.valueType:
+            return self.visitIfNode(node, context)
+        case = node.table.get(value.value)
+        if case is None:
+            return self.visitIfNode(node, context, node.size)
+        return self.visit(node.cases[case][1], context)
+
+    def expectInt(self, value, node, context):
+        if not isinstance(value, Number) or not isinstance(value.value, int):
+            raise RTError(
                 node.startPos, node.endPos,
                 "Expected int",
                 context
-            ))
+            )
+        return value.value
 
-        endValue = res.register(self.visit(node.endValueNode, context))
-        if res.err:
-            return res
-        if not isinstance(endValue, Number) or not isinstance(endValue.value, int):
-            return res.failure(RTError(
-                node.startPos, node.endPos,
-                "Expected int",
-                context
-            ))
+    def visitForNode(self, node, context):
+        result = NONE
 
+        start = self.expectInt(self.visit(node.startValueNode, context), node, context)
+        end = self.expectInt(self.visit(node.endValueNode, context), node, context)
         if node.stepValueNode:
-            stepValue = res.register(self.visit(node.stepValueNode, context))
-            if res.err:
-                return res
+            step = self.expectInt(self.visit(node.stepValueNode, context), node, context)
         else:
-            stepValue = Number(1)
-        if not isinstance(stepValue, Number) or not isinstance(stepValue.value, int):
-            return res.failure(RTError(
-                node.startPos, node.endPos,
-                "Expected int",
-                context
-            ))
+            step = 1
 
-        for i in range(startValue.value, endValue.value, stepValue.value):
-            context.symbolTable.set(node.varNameTkn.value, Number(i))
-
-            result = res.register(self.visit(node.bodyNode, context))
-            if res.err:
-                return res
-            if isinstance(result, (ReturnValue, BreakValue)):
-                break
-        
-        if isinstance(result, BreakValue):
-            result = NoneValue().setContext(result.context).setPos(
-                result.startPos, result.endPos
-            )
-        elif node.elseNode:
-            result = res.register(self.visit(node.elseNode, context))
-            if res.err:
-                return res
+        visit, cold = self.loopTier(node)
+        bodyNode = node.bodyNode
+        symbolTable = context.symbolTable
+        try:
+            if node.slot is None:
+                varName = node.varNameTkn.value
+                symbols = symbolTable.symbols
+                for i in range(start, end, step):
+                    if varName in symbols:
+                        symbols[varName] = Number(i)
+                    else:
+                        symbolTable.set(varName, Number(i))
+                    result = visit(bodyNode, context)
+                    if cold:
+                        node.hits += 1
+                        if node.hits >= TIER_UP_ITERATIONS:
+                            visit, cold = self.tierUp(node, "for loop", f"{node.hits} iterations"), False
+            else:
+                slots = symbolTable.slots
+                slot = node.slot
+                for i in range(start, end, step):
+                    slots[slot] = Number(i)
+                    result = visit(bodyNode, context)
+                    if cold:
+                        node.hits += 1
+                        if node.hits >= TIER_UP_ITERATIONS:
+                            visit, cold = self.tierUp(node, "for loop", f"{node.hits} iterations"), False
+        except BreakSignal:
+            return NONE
+
+        if node.elseNode:
+            result = self.visit(node.elseNode, context)
+
+        return result
 
-        return res.success(result)
-    
     def visitForEachNode(self, node, context):
-        res = RTResult()
-        
-        result = NoneValue().setContext(context).setPos(node.startPos, node.endPos)
+        result = NONE
 
-        listExpr = res.register(self.visit(node.listNode, context))
-        if res.err:
-            return res
+        listExpr = self.visit(node.listNode, context)
         if not isinstance(listExpr, List) and not isinstance(listExpr, String):
-            return res.failure(RTError(
+            raise RTError(
                 node.startPos, node.endPos,
                 "Expected list or string in for each",
                 context
-            ))
-
-        for elem in listExpr.value:
-            if isinstance(elem, str):
-                elem = String(elem)
-            context.symbolTable.set(node.varNameTkn.value, elem)
-
-            result = res.register(self.visit(node.bodyNode, context))
-            if res.err:
-                return res
-            if isinstance(result, (ReturnValue, BreakValue)):
-                break
-        
-        if isinstance(result, BreakValue):
-            result = NoneValue().setContext(result.context).setPos(
-                result.startPos, result.endPos
             )
-        elif node.elseNode:
-            result = res.register(self.visit(node.elseNode, context))
-            if res.err:
-                return res
-
-        return res.success(result)
+        if isinstance(listExpr, List):
+            listExpr.unshare()
+
+        visit, cold = self.loopTier(node)
+        try:
+            for elem in listExpr.value:
+                if isinstance(elem, str):
+                    elem = String(elem)
+                if node.slot is None:
+                    context.symbolTable.set(node.varNameTkn.value, elem)
+                else:
+                    context.symbolTable.slots[node.slot] = None if isinstance(elem, NoneValue) else elem
+                result = visit(node.bodyNode, context)
+                if cold:
+                    node.hits += 1
+                    if node.hits >= TIER_UP_ITERATIONS:
+                        visit, cold = self.tierUp(node, "for each loop", f"{node.hits} iterations"), False
+        except BreakSignal:
+            return NONE
+
+        if node.elseNode:
+            result = self.visit(node.elseNode, context)
+
+        return result
 
     def visitWhileNode(self, node, context):
-        res = RTResult()
-        
-        result = NoneValue().setContext(context).setPos(node.startPos, node.endPos)
+        result = NONE
 
-        while True:
-            cond = res.register(self.visit(node.condNode, context))
-            if res.err:
-                return res
+        visit, cold = self.loopTier(node)
+        try:
+            while visit(node.condNode, context).isTrue():
+                result = visit(node.bodyNode, context)
+                if cold:
+                    node.hits += 1
+                    if node.hits >= TIER_UP_ITERATIONS:
+                        visit, cold = self.tierUp(node, "while loop", f"{node.hits} iterations"), False
+        except BreakSignal:
+            return NONE
 
-            if cond.isFalse():
-                break
+        if node.elseNode:
+            result = self.visit(node.elseNode, context)
 
-            result = res.register(self.visit(node.bodyNode, context))
-            if res.err:
-                return res
-            if isinstance(result, (ReturnValue, BreakValue)):
-                break
-        
-        if isinstance(result, BreakValue):
-            result = NoneValue().setContext(result.context).setPos(
-                result.startPos, result.endPos
-            )
-        elif node.elseNode:
-            result = res.register(self.visit(node.elseNode, context))
-            if res.err:
-                return res
+        return result
 
-        return res.success(result)
-    
     def visitBreakNode(self, node, context):
-        return RTResult().success(
-            BreakValue().setContext(context).setPos(
-                node.startPos, node.endPos
-            )
-        )
+        raise BreakSignal()
 
     def visitFuncDefNode(self, node, context):
-        res = RTResult()
-
         funcName = node.varNameTkn.value if node.varNameTkn else None
         bodyNode = node.bodyNode
         argNames = [argName.value for argName in node.argNameTkns]
         canMod = node.canMod
         isBuiltin = node.isBuiltin
         funcValue = Function(
-            funcName, bodyNode, argNames, canMod, isBuiltin
-        ).setContext(context).setPos(node.startPos, node.endPos)
+            funcName, bodyNode, argNames, canMod, isBuiltin, node.layout
+        ).setContext(context)
 
-        if node.varNameTkn and funcName not in BUILTINS:
+        if node.slot is not None:
+            context.symbolTable.slots[node.slot] = funcValue
+        elif node.varNameTkn and funcName not in BUILTINS:
             context.symbolTable.set(funcName, funcValue)
 
-        return res.success(funcValue)
+        return funcValue
 
     def visitCallNode(self, node, context):
-        res = RTResult()
-        args = []
-
-        valueToCall = res.register(self.visit(node.nodeToCall, context))
-        if res.err:
-            return res
+        valueToCall = self.visit(node.nodeToCall, context)
+        if self.quicken:
+            self.observe(node, valueToCall if type(valueToCall) is Function else None, lp.FunctionCallNode)
+        return self.call(node, valueToCall, context)
+
+    def visitFunctionCallNode(self, node, context):
+        function = self.visit(node.nodeToCall, context)
+        if function is not node.quick:
+            self.deoptimize(node)
+            return self.call(node, function, context)
+
+        args = [self.visit(argNode, context) for argNode in node.argNodes]
+        if node.tail:
+            raise TailCallSignal(function, args, function.context, node)
+        return function.execute(args, function.context, node, self)
+
+    def visitInlineCallNode(self, node, context):
+        callNode = node.callNode
+        valueToCall = self.visit(callNode.nodeToCall, context)
+        if type(valueToCall) is Function and valueToCall.bodyNode is node.calleeBody:
+            try:
+                return self.visit(node.expansion, context)
+            except RTError:
+                pass
+        return self.call(callNode, valueToCall, context)
 
-        valueToCall.setPos(node.startPos, node.endPos)
+    def call(self, node, valueToCall, context):
+        args = [self.visit(argNode, context) for argNode in node.argNodes]
 
-        for argNode in node.argNodes:
-            args.append(res.register(self.visit(argNode, context)))
-            if res.err:
-                return res
-        
         callContext = context if valueToCall.context is None else valueToCall.context
 
-        returnValue = res.register(valueToCall.execute(args, callContext, self.dev))
-        if res.err:
-            return res
+        if node.tail:
+            raise TailCallSignal(valueToCall, args, callContext, node)
+        return valueToCall.execute(args, callContext, node, self)
 
-        return res.success(returnValue)
-    
     def visitReturnNode(self, node, context):
-        res = RTResult()
-        value = res.register(self.visit(node.exprNode, context))
-        if res.err:
-            return res
-        return res.success(
-            ReturnValue(value).setContext(context).setPos(
-                node.startPos, node.endPos
-            )
-        )
-    
-    def visitBlockNode(self, node, context):
-        res = RTResult()
+        raise ReturnSignal(self.visit(node.exprNode, context))
 
-        exprValue = NoneValue().setContext(context).setPos(node.startPos, node.endPos)
+    def visitBlockNode(self, node, context):
+        exprValue = NONE
         for exprNode in node.exprNodes:
-            exprValue = res.register(self.visit(exprNode, context))
-            if res.err:
-                return res
-            if isinstance(exprValue, (ReturnValue, BreakValue)):
-                break
-            
-        return res.success(exprValue)
-    
-    def visitDispNode(self, node, context):
-        res = RTResult()
+            exprValue = self.visit(exprNode, context)
 
-        exprValue = res.register(self.visit(node.bodyNode, context))
-        if res.err:
-            return res
+        return exprValue
+
+    def visitDispNode(self, node, context):
+        exprValue = self.visit(node.bodyNode, context)
 
         print(exprValue, end="\n" if node.newLine else "")
-        return res.success(exprValue)
-    
+        return exprValue
+
     def isNum(self, s):
         for c in s:
             if c not in DIGITS:
                 return False
         return True
-    
+
     def visitInputNode(self, node, context):
-        res = RTResult()
         KB.set_normal_term()
         val = input()
         KB.set_getch_term()
         if not self.isNum(val.replace(".", "", 1)) or len(val) == 0:
-            return res.success(String(val).setContext(context).setPos(node.startPos, node.endPos))
+            return String(val)
         if "." in val:
-            return res.success(Number(float(val)).setContext(context).setPos(node.startPos, node.endPos))
-        return res.success(Number(int(val)).setContext(context).setPos(node.startPos, node.endPos))
-    
+            return Number(float(val))
+        return Number(int(val))
+
     def visitGetchNode(self, node, context):
-        return RTResult().success(String(KB.getch()).setContext(context).setPos(node.startPos, node.endPos))
-    
+        return String(KB.getch())
+
     def visitKbhitNode(self, node, context):
-       return RTResult().success(Number(1 if KB.kbhit() else 0).setContext(context).setPos(node.startPos, node.endPos))
-    
+       return boolean(KB.kbhit())
+
     def visitRandNode(self, node, context):
-        res = RTResult()
-        return res.success(Number(random()))
-    
+        return Number(random())
+
     def visitIntCastNode(self, node, context):
-        res = RTResult()
-        expr = res.register(self.visit(node.exprNode, context))
-        if res.err:
-            return res
+        expr = self.visit(node.exprNode, context)
         canCast = True
         if not isinstance(expr, Number):
             canCast = False
         if isinstance(expr, String) and self.isNum(expr.value) and len(expr.value) > 0:
             canCast = True
         if not canCast:
-            return res.failure(RTError(
+            raise RTError(
                 node.startPos, node.endPos,
                 "Cannot cast to integer",
                 context
-            ))
-        return res.success(Number(int(expr.value)))
-    
+            )
+        return Number(int(expr.value))
+
     def visitFloatCastNode(self, node, context):
-        res = RTResult()
-        expr = res.register(self.visit(node.exprNode, context))
-        if res.err:
-            return res
+        expr = self.visit(node.exprNode, context)
         canCast = True
         if not isinstance(expr, Number):
             canCast = False
         if isinstance(expr, String) and self.isNum(expr.value.replace(".", "", 1)) and len(expr.value) > 0:
             canCast = True
         if not canCast:
-            return res.failure(RTError(
+            raise RTError(
                 node.startPos, node.endPos,
                 "Cannot cast to float",
                 context
-            ))
-        return res.success(Number(float(expr.value)))
-    
+            )
+        return Number(float(expr.value))
+
     def visitStrCastNode(self, node, context):
-        res = RTResult()
-        expr = res.register(self.visit(node.exprNode, context))
-        if res.err:
-            return res
-        return res.success(String(str(expr.value)))
-    
+        expr = self.visit(node.exprNode, context)
+        return String(str(expr.value))
+
     def visitReadNode(self, node, context):
-        res = RTResult()
-        
-        fileName = res.register(self.visit(node.fileNameNode, context))
-        if res.err:
-            return res
+        fileName = self.visit(node.fileNameNode, context)
         if not isinstance(fileName, String):
-            return res.failure(RTError(
+            raise RTError(
                 node.fileNameNode.startPos, node.fileNameNode.endPos,
                 "File name must be a string",
                 context
-            ))
-        
+            )
+
         if fileName.value.startswith("/"):
             fn = fileName.value
         else:
             dir = os.path.normpath(os.path.dirname(node.startPos.fn))
             fn = os.path.normpath(dir + "/" + fileName.value)
         if not os.path.isfile(fn):
-            return res.failure(RTError(
+            raise RTError(
                 node.fileNameNode.startPos, node.fileNameNode.endPos,
                 f"File {fileName} not found",
                 context
-            ))
-        
+            )
+
         if node.byteMode:
             with open(fn, "rb") as f:
                 result = List([Number(i) for i in list(f.read())])
@@ -883,110 +1072,89 @@ class Interpreter:
                 with open(fn, "r") as f:
                     result = String(f.read())
             except UnicodeDecodeError:
-                return res.failure(RTError(
+                raise RTError(
                     node.fileNameNode.startPos, node.fileNameNode.endPos,
                     f"File {fileName} could not be read as text",
                     context
-                ))
-        
-        return res.success(result)
-    
+                )
+
+        return result
+
     def visitWriteNode(self, node, context):
-        res = RTResult()
-        
-        fileName = res.register(self.visit(node.fileNameNode, context))
-        if res.err:
-            return res
+        fileName = self.visit(node.fileNameNode, context)
         if not isinstance(fileName, String):
-            return res.failure(RTError(
+            raise RTError(
                 node.fileNameNode.startPos, node.fileNameNode.endPos,
                 "File name must be a string",
                 context
-            ))
-        
+            )
+
         if fileName.value.startswith("/"):
             fn = fileName.value
         else:
             dir = os.path.normpath(os.path.dirname(node.startPos.fn))
             fn = os.path.normpath(dir + "/" + fileName.value)
-        
-        fileContent = res.register(self.visit(node.fileContentNode, context))
-        if res.err:
-            return res
-        
+
+        fileContent = self.visit(node.fileContentNode, context)
+
         if node.byteMode:
             if not (isinstance(fileContent, List) and all(isinstance(num, Number) and num.value in range(256) for num in fileContent.value)):
-                return res.failure(RTError(
+                raise RTError(
                     node.fileContentNode.startPos, node.fileContentNode.endPos,
                     "File content must be a list of integers from 0 to 255",
                     context
-                ))
+                )
             try:
                 with open(fn, "wb") as f:
                     f.write(bytes([num.value for num in fileContent.value]))
             except FileNotFoundError:
-                return res.failure(RTError(
+                raise RTError(
                     node.fileContentNode.startPos, node.fileContentNode.endPos,
                     f"File {fileName} could not be created. No such directory",
                     context
-                ))
+                )
         else:
             if not isinstance(fileContent, String):
-                return res.failure(RTError(
+                raise RTError(
                     node.fileContentNode.startPos, node.fileNameNode.endPos,
                     "File content must be a string",
                     context
-                ))
+                )
             try:
                 with open(fn, "w") as f:
                     f.write(fileContent.value)
             except FileNotFoundError:
-                return res.failure(RTError(
+                raise RTError(
                     node.fileContentNode.startPos, node.fileNameNode.endPos,
                     f"File {fileName} could not be created. No such directory",
                     context
-                ))
-        
-        return res.success(fileContent)
-    
+                )
+
+        return fileContent
+
     def visitClsNode(self, node, context):
         os.system("cls" if os.name == "nt" else "clear")
-        return RTResult().success(NoneValue().setContext(context).setPos(node.startPos, node.endPos))
-    
+        return NONE
+
     def visitTimeNode(self, node, context):
-        return RTResult().success(
-            Number(time.time_ns()).setContext(context).setPos(node.startPos, node.endPos)
-        )
-    
+        return Number(time.time_ns())
+
     def visitCLINode(self, node, context):
-        res = RTResult()
-        cmd = res.register(self.visit(node.cmdNode, context))
-        if res.err:
-            return res
+        cmd = self.visit(node.cmdNode, context)
         if not isinstance(cmd, String):
-            return res.failure(RTError(
+            raise RTError(
                 node.startPos, node.endPos,
                 "CLI command must be a string value",
                 context
-            ))
+            )
         os.system(cmd.value)
-        return res.success(
-            NoneValue().setContext(context).setPos(node.startPos, node.endPos)
-        )
-    
+        return NONE
+
     def visitOSNode(self, node, context):
-        return RTResult().success(
-            String(sys.platform).setContext(context).setPos(node.startPos, node.endPos)
-        )
-    
+        return String(sys.platform)
+
     def visitTryCatchNode(self, node, context):
-        res = RTResult()
-        
-        result = res.register(self.visit(node.tryNode, context))
-        if res.err:
-            res.err = None
-            result = res.register(self.visit(node.catchNode, context))
-            if res.err:
-                return res
-        
-        return res.success(result)
+        try:
+            return self.visit(node.tryNode, context)
+        except RTError:
+            return self.visit(node.catchNode, context)
@@ -61,6 +61,8 @@ KEYWORDS = [
 
 
 class Token:
+    __slots__ = ("type", "value", "startPos", "endPos")
+
     def __init__(self, type_, value=None, startPos=None, endPos=None):
         self.type = type_
         self.value = value
@@ -0,0 +1,182 @@
+import tokens as tok
+from values import Number, String, BOOL_AND, BOOL_OR, OPERATORS
+import languageParser as lp
+from languageLexer import Token
+
+################
+# OPTIMIZER
+################
+
+
+MAX_FOLDED_POWER = 1024
+MAX_FOLDED_STRING = 1024
+MIN_SWITCH_CASES = 4
+
+
+class Optimizer:
+    def optimize(self, node):
+        method = getattr(self, f"optimize{type(node).__name__}", self.optimizeChildren)
+        return method(node)
+
+    def optimizeChildren(self, node):
+        for name, value in node.fields():
+            setattr(node, name, self.optimizeValue(value))
+        return node
+
+    def optimizeValue(self, value):
+        if isinstance(value, list):
+            return [self.optimizeValue(element) for element in value]
+        if isinstance(value, tuple):
+            return tuple(self.optimizeValue(element) for element in value)
+        if lp.isNode(value):
+            return self.optimize(value)
+        return value
+
+    def constant(self, node):
+        if isinstance(node, lp.NumberNode):
+            return Number(node.tkn.value)
+        if isinstance(node, lp.StringNode):
+            return String(node.tkn.value)
+        if isinstance(node, lp.VarAccessNode):
+            if node.varNameTkn.value == "true":
+                return Number(1)
+            if node.varNameTkn.value == "false":
+                return Number(0)
+        return None
+
+    def constantNode(self, value, node):
+        if isinstance(value, String):
+            if len(value.value) > MAX_FOLDED_STRING:
+                return None
+            return lp.StringNode(Token(tok.TT_STRING, value.value, node.startPos, node.endPos))
+        if isinstance(value, Number) and type(value.value) in (int, float):
+            tknType = tok.TT_INT if isinstance(value.value, int) else tok.TT_FLOAT
+            return lp.NumberNode(Token(tknType, value.value, node.startPos, node.endPos))
+        return None
+
+    def fold(self, node, operation, *operands):
+        try:
+            value, err = operation(*operands)
+        except ArithmeticError:
+            return node
+        if err:
+            return node
+        return self.constantNode(value, node) or node
+
+    def isCheap(self, methodName, left, right):
+        if methodName == "powedBy":
+            return not (isinstance(right.value, int) and abs(right.value) > MAX_FOLDED_POWER)
+        if methodName == "multedBy" and (isinstance(left, String) or isinstance(right, String)):
+            count = right.value if isinstance(left, String) else left.value
+            return not isinstance(count, int) or count <= MAX_FOLDED_STRING
+        return True
+
+    def optimizeBinOpNode(self, node):
+        node.lNode = self.optimize(node.lNode)
+        node.rNode = self.optimize(node.rNode)
+        left = self.constant(node.lNode)
+        right = self.constant(node.rNode)
+
+        operator = node.operator
+        if operator is None:
+            return node
+
+        if operator is BOOL_AND or operator is BOOL_OR:
+            if left is None:
+                return node
+            if operator is BOOL_AND and left.isFalse():
+                return self.constantNode(Number(0), node)
+            if operator is BOOL_OR and left.isTrue():
+                return self.constantNode(Number(1), node)
+            if right is None:
+                return node
+            return self.fold(node, operator.apply, left, right)
+
+        methodName = operator.name
+
+        if left is not None and right is not None:
+            if not self.isCheap(methodName, left, right):
+                return node
+            return self.fold(node, operator.apply, left, right)
+
+        if (
+            methodName == "powedBy" and isinstance(node.lNode, lp.VarAccessNode)
+            and isinstance(right, Number) and type(right.value) is int and right.value == 2
+        ):
+            square = lp.BinOpNode(
+                node.lNode,
+                Token(tok.TT_MUL, None, node.opTkn.startPos, node.opTkn.endPos),
+                lp.VarAccessNode(node.lNode.varNameTkn)
+            )
+            square.endPos = node.endPos
+            return square
+
+        return node
+
+    def optimizeUnaryOpNode(self, node):
+        node.node = self.optimize(node.node)
+        value = self.constant(node.node)
+        if value is None:
+            return node
+
+        if node.opTkn.type == tok.TT_MINUS:
+            return self.fold(node, Number(0).subbedBy, value)
+        if node.opTkn.type == tok.TT_PLUS:
+            return self.fold(node, Number(0).addedTo, value)
+        if node.opTkn.matches(tok.TT_KEYWORD, "not"):
+            return self.fold(node, value.boolNot)
+        return node
+
+    def optimizeIfNode(self, node):
+        self.optimizeChildren(node)
+
+        cases = []
+        for cond, expr in node.cases:
+            value = self.constant(cond)
+            if value is None:
+                cases.append((cond, expr))
+            elif value.isTrue():
+                if len(cases) == 0:
+                    return expr
+                node.cases = cases
+                node.elseCase = expr
+                return node
+
+        if len(cases) == 0:
+            if node.elseCase:
+                return node.elseCase
+            return lp.NoneValueNode(Token(tok.TT_KEYWORD, "none", node.startPos, node.endPos))
+        node.cases = cases
+        return self.switch(node)
+
+    def switchCase(self, cond):
+        if type(cond) is not lp.BinOpNode or cond.operator is not OPERATORS["isEqual"]:
+            return None
+        for subject, literal in ((cond.lNode, cond.rNode), (cond.rNode, cond.lNode)):
+            if type(subject) is not lp.VarAccessNode:
+                continue
+            if type(literal) is lp.StringNode:
+                return subject, String, literal.tkn.value
+            if type(literal) is lp.NumberNode and literal.tkn.type == tok.TT_INT:
+                return subject, Number, literal.tkn.value
+        return None
+
+    def switch(self, node):
+        subject = None
+        table = {}
+        size = 0
+        for cond, _ in node.cases:
+            case = self.switchCase(cond)
+            if case is None:
+                break
+            varNode, valueType, key = case
+            if subject is None:
+                subject, switchType = varNode, valueType
+            elif varNode.varNameTkn.value != subject.varNameTkn.value or valueType is not switchType:
+                break
+            table.setdefault(key, size)
+            size += 1
+
+        if size < MIN_SWITCH_CASES:
+            return node
+        return lp.SwitchNode(node, subject, switchType, table, size)
@@ -2,13 +2,25 @@ from error import InvalidSyntaxError
 from tokens import *
 from languageLexer import Token
 import languageInterpreter as li
+import values
 
 ################
 # NODES
 ################
 
 
-class NoneValueNode:
+class Node:
+    __slots__ = ("startPos", "endPos", "closure", "code", "unit")
+    generic = None
+
+    def fields(self):
+        nodeType = self.generic or type(self)
+        return [(name, getattr(self, name)) for name in nodeType.__slots__]
+
+
+class NoneValueNode(Node):
+    __slots__ = ("tkn",)
+
     def __init__(self, tkn):
         self.tkn = tkn
         self.startPos = tkn.startPos
@@ -18,9 +30,12 @@ class NoneValueNode:
         return f"{self.tkn}"
 
 
-class NumberNode:
+class NumberNode(Node):
+    __slots__ = ("tkn", "constant")
+
     def __init__(self, tkn):
         self.tkn = tkn
+        self.constant = None
         self.startPos = tkn.startPos
         self.endPos = tkn.endPos
 
@@ -28,9 +43,12 @@ class NumberNode:
         return f"{self.tkn}"
 
 
-class StringNode:
+class StringNode(Node):
+    __slots__ = ("tkn", "constant")
+
     def __init__(self, tkn):
         self.tkn = tkn
+        self.constant = None
         self.startPos = tkn.startPos
         self.endPos = tkn.endPos
     
@@ -38,7 +56,9 @@ class StringNode:
         return self.tkn
 
 
-class ListNode:
+class ListNode(Node):
+    __slots__ = ("exprNodes",)
+
     def __init__(self, exprNodes):
         self.exprNodes = exprNodes
 
@@ -50,35 +70,52 @@ class ListNode:
             self.endPos = None
 
 
-class VarAccessNode:
+class VarAccessNode(Node):
+    __slots__ = ("varNameTkn", "slot", "valueType", "cache")
+
     def __init__(self, varNameTkn):
         self.varNameTkn = varNameTkn
+        self.slot = None
+        self.valueType = None
+        self.cache = None
         self.startPos = varNameTkn.startPos
         self.endPos = varNameTkn.endPos
 
 
-class VarAssignNode:
+class VarAssignNode(Node):
+    __slots__ = ("varNameTkn", "valueNode", "slot")
+
     def __init__(self, varNameTkn, valueNode):
         self.varNameTkn = varNameTkn
         self.valueNode = valueNode
+        self.slot = None
         self.startPos = varNameTkn.startPos
         self.endPos = valueNode.endPos
 
 
-class ListModifNode:
+class ListModifNode(Node):
+    __slots__ = ("varNameTkn", "idxNodes", "valueNode", "idxNode")
+
     def __init__(self, varNameTkn, idxNodes, valueNode):
         self.varNameTkn = varNameTkn
         self.idxNodes = idxNodes
         self.valueNode = valueNode
+        self.idxNode = None
         self.startPos = varNameTkn.startPos
         self.endPos = valueNode.endPos
 
 
-class BinOpNode:
+class BinOpNode(Node):
+    __slots__ = ("lNode", "opTkn", "rNode", "operator", "operandTypes", "hits", "quick")
+
     def __init__(self, lNode, opTkn, rNode):
         self.lNode = lNode
         self.opTkn = opTkn
         self.rNode = rNode
+        self.operator = values.binaryOperator(opTkn)
+        self.operandTypes = None
+        self.hits = 0
+        self.quick = None
         self.startPos = lNode.startPos
         self.endPos = rNode.endPos
 
@@ -86,7 +123,19 @@ class BinOpNode:
         return f"({self.lNode}, {self.opTkn}, {self.rNode})"
 
 
-class UnaryOpNode:
+class NumberBinOpNode(BinOpNode):
+    __slots__ = ()
+    generic = BinOpNode
+
+
+class StringBinOpNode(BinOpNode):
+    __slots__ = ()
+    generic = BinOpNode
+
+
+class UnaryOpNode(Node):
+    __slots__ = ("opTkn", "node")
+
     def __init__(self, opTkn, node):
         self.opTkn = opTkn
         self.node = node
@@ -97,7 +146,9 @@ class UnaryOpNode:
         return f"({self.opTkn}, {self.node})"
 
 
-class IfNode:
+class IfNode(Node):
+    __slots__ = ("cases", "elseCase")
+
     def __init__(self, cases, elseCase):
         self.cases = cases
         self.elseCase = elseCase
@@ -106,7 +157,23 @@ class IfNode:
         self.endPos = elseCase.endPos if elseCase else cases[-1][1].endPos
 
 
-class ForNode:
+class SwitchNode(IfNode):
+    __slots__ = ("subject", "valueType", "table", "size")
+
+    def __init__(self, ifNode, subject, valueType, table, size):
+        IfNode.__init__(self, ifNode.cases, ifNode.elseCase)
+        self.subject = subject
+        self.valueType = valueType
+        self.table = table
+        self.size = size
+
+    def fields(self):
+        return [("cases", self.cases), ("elseCase", self.elseCase)]
+
+
+class ForNode(Node):
+    __slots__ = ("varNameTkn", "startValueNode", "endValueNode", "stepValueNode", "bodyNode", "elseNode", "slot", "hits")
+
     def __init__(self, varNameTkn, startValueNode, endValueNode,
                  stepValueNode, bodyNode, elseNode):
         self.varNameTkn = varNameTkn
@@ -115,44 +182,59 @@ class ForNode:
         self.stepValueNode = stepValueNode
         self.bodyNode = bodyNode
         self.elseNode = elseNode
+        self.slot = None
+        self.hits = 0
 
         self.startPos = varNameTkn.startPos
         self.endPos = elseNode.endPos if elseNode else bodyNode.endPos
 
-class ForEachNode:
+class ForEachNode(Node):
+    __slots__ = ("varNameTkn", "listNode", "bodyNode", "elseNode", "slot", "hits")
+
     def __init__(self, varNameTkn, listNode, bodyNode, elseNode):
         self.varNameTkn = varNameTkn
         self.listNode = listNode
         self.bodyNode = bodyNode
         self.elseNode = elseNode
+        self.slot = None
+        self.hits = 0
         
         self.startPos = varNameTkn.startPos
         self.endPos = elseNode.endPos if elseNode else bodyNode.endPos
 
 
-class WhileNode:
+class WhileNode(Node):
+    __slots__ = ("condNode", "bodyNode", "elseNode", "hits")
+
     def __init__(self, condNode, bodyNode, elseNode):
         self.condNode = condNode
         self.bodyNode = bodyNode
         self.elseNode = elseNode
+        self.hits = 0
 
         self.startPos = condNode.startPos
         self.endPos = elseNode.endPos if elseNode else bodyNode.endPos
 
 
-class BreakNode:
+class BreakNode(Node):
+    __slots__ = ()
+
     def __init__(self, tkn):
         self.startPos = tkn.startPos
         self.endPos = tkn.endPos
 
 
-class FuncDefNode:
+class FuncDefNode(Node):
+    __slots__ = ("varNameTkn", "argNameTkns", "bodyNode", "canMod", "isBuiltin", "slot", "layout")
+
     def __init__(self, varNameTkn, argNameTkns, bodyNode, canMod, isBuiltin):
         self.varNameTkn = varNameTkn
         self.argNameTkns = argNameTkns
         self.bodyNode = bodyNode
         self.canMod = canMod
         self.isBuiltin = isBuiltin
+        self.slot = None
+        self.layout = None
 
         if varNameTkn:
             self.startPos = varNameTkn.startPos
@@ -164,10 +246,15 @@ class FuncDefNode:
         self.endPos = bodyNode.endPos
 
 
-class CallNode:
+class CallNode(Node):
+    __slots__ = ("nodeToCall", "argNodes", "tail", "hits", "quick")
+
     def __init__(self, nodeToCall, argNodes):
         self.nodeToCall = nodeToCall
         self.argNodes = argNodes
+        self.tail = False
+        self.hits = 0
+        self.quick = None
 
         self.startPos = nodeToCall.startPos
 
@@ -177,7 +264,29 @@ class CallNode:
             self.endPos = nodeToCall.endPos
 
 
-class ReturnNode:
+class FunctionCallNode(CallNode):
+    __slots__ = ()
+    generic = CallNode
+
+
+class InlineCallNode(Node):
+    __slots__ = ("callNode", "expansion", "calleeBody")
+
+    def __init__(self, callNode, expansion, calleeBody):
+        self.callNode = callNode
+        self.expansion = expansion
+        self.calleeBody = calleeBody
+
+        self.startPos = callNode.startPos
+        self.endPos = callNode.endPos
+
+    def fields(self):
+        return [("callNode", self.callNode), ("expansion", self.expansion)]
+
+
+class ReturnNode(Node):
+    __slots__ = ("exprNode",)
+
     def __init__(self, exprNode):
         self.exprNode = exprNode
 
@@ -185,7 +294,9 @@ class ReturnNode:
         self.endPos = exprNode.endPos
 
 
-class BlockNode:
+class BlockNode(Node):
+    __slots__ = ("exprNodes",)
+
     def __init__(self, exprNodes, bracketPos=None):
         self.exprNodes = exprNodes
 
@@ -197,7 +308,9 @@ class BlockNode:
             self.endPos = bracketPos
 
 
-class DispNode:
+class DispNode(Node):
+    __slots__ = ("bodyNode", "newLine")
+
     def __init__(self, bodyNode, newLine):
         self.bodyNode = bodyNode
         self.newLine = newLine
@@ -206,31 +319,41 @@ class DispNode:
         self.endPos = bodyNode.endPos
 
 
-class InputNode:
+class InputNode(Node):
+    __slots__ = ()
+
     def __init__(self, inputTkn):
         self.startPos = inputTkn.startPos
         self.endPos = inputTkn.endPos
 
 
-class GetchNode:
+class GetchNode(Node):
+    __slots__ = ()
+
     def __init__(self, getchTkn):
         self.startPos = getchTkn.startPos
         self.endPos = getchTkn.endPos
 
 
-class KbhitNode:
+class KbhitNode(Node):
+    __slots__ = ()
+
     def __init__(self, kbhitTkn):
         self.startPos = kbhitTkn.startPos
         self.endPos = kbhitTkn.endPos
 
 
-class RandNode:
+class RandNode(Node):
+    __slots__ = ()
+
     def __init__(self, randTkn):
         self.startPos = randTkn.startPos
         self.endPos = randTkn.endPos
 
 
-class IntCastNode:
+class IntCastNode(Node):
+    __slots__ = ("exprNode",)
+
     def __init__(self, exprNode):
         self.exprNode = exprNode
 
@@ -238,7 +361,9 @@ class IntCastNode:
         self.endPos = exprNode.endPos
 
 
-class FloatCastNode:
+class FloatCastNode(Node):
+    __slots__ = ("exprNode",)
+
     def __init__(self, exprNode):
         self.exprNode = exprNode
 
@@ -246,7 +371,9 @@ class FloatCastNode:
         self.endPos = exprNode.endPos
 
 
-class StrCastNode:
+class StrCastNode(Node):
+    __slots__ = ("exprNode",)
+
     def __init__(self, exprNode):
         self.exprNode = exprNode
 
@@ -254,7 +381,9 @@ class StrCastNode:
         self.endPos = exprNode.endPos
 
 
-class IncludeNode:
+class IncludeNode(Node):
+    __slots__ = ("fileNode", "moduleName")
+
     def __init__(self, fileNode, moduleName):
         self.fileNode = fileNode
         self.moduleName = moduleName
@@ -263,16 +392,27 @@ class IncludeNode:
         self.endPos = fileNode.endPos
 
 
-class AccessNode:
+class AccessNode(Node):
+    __slots__ = ("moduleNode", "varNameTkn", "cache", "hits")
+
     def __init__(self, moduleNode, varNameTkn):
         self.moduleNode = moduleNode
         self.varNameTkn = varNameTkn
+        self.cache = None
+        self.hits = 0
         
         self.startPos = moduleNode.startPos
         self.endPos = varNameTkn.endPos
 
 
-class TypeNode:
+class CachedAccessNode(AccessNode):
+    __slots__ = ()
+    generic = AccessNode
+
+
+class TypeNode(Node):
+    __slots__ = ("valueNode",)
+
     def __init__(self, valueNode):
         self.valueNode = valueNode
         
@@ -280,7 +420,9 @@ class TypeNode:
         self.endPos = valueNode.endPos
 
 
-class ClassNode:
+class ClassNode(Node):
+    __slots__ = ("varNameTkn", "bodyNode", "parentTkn")
+
     def __init__(self, varNameTkn, parentTkn, bodyNode):
         self.varNameTkn = varNameTkn
         self.bodyNode = bodyNode
@@ -290,7 +432,9 @@ class ClassNode:
         self.endPos = bodyNode.endPos
 
 
-class ReadNode:
+class ReadNode(Node):
+    __slots__ = ("fileNameNode", "byteMode")
+
     def __init__(self, fileNameNode, byteMode=False):
         self.fileNameNode = fileNameNode
         self.byteMode = byteMode
@@ -299,7 +443,9 @@ class ReadNode:
         self.endPos = fileNameNode.endPos
 
 
-class WriteNode:
+class WriteNode(Node):
+    __slots__ = ("fileNameNode", "fileContentNode", "byteMode")
+
     def __init__(self, fileNameNode, fileContentNode, byteMode=False):
         self.fileNameNode = fileNameNode
         self.fileContentNode = fileContentNode
@@ -309,19 +455,25 @@ class WriteNode:
         self.endPos = fileContentNode.endPos
 
 
-class ClsNode:
+class ClsNode(Node):
+    __slots__ = ()
+
     def __init__(self, tkn):
         self.startPos = tkn.startPos
         self.endPos = tkn.endPos
 
 
-class TimeNode:
+class TimeNode(Node):
+    __slots__ = ()
+
     def __init__(self, tkn):
         self.startPos = tkn.startPos
         self.endPos = tkn.endPos
 
 
-class CLINode:
+class CLINode(Node):
+    __slots__ = ("cmdNode",)
+
     def __init__(self, cmdNode):
         self.cmdNode = cmdNode
         
@@ -329,13 +481,17 @@ class CLINode:
         self.endPos = cmdNode.endPos
 
 
-class OSNode:
+class OSNode(Node):
+    __slots__ = ()
+
     def __init__(self, tkn):
         self.startPos = tkn.startPos
         self.endPos = tkn.endPos
 
 
-class TryCatchNode:
+class TryCatchNode(Node):
+    __slots__ = ("tryNode", "catchNode")
+
     def __init__(self, tryNode, catchNode):
         self.tryNode = tryNode
         self.catchNode = catchNode
@@ -344,6 +500,10 @@ class TryCatchNode:
         self.endPos = catchNode.endPos
 
 
+def isNode(value):
+    return isinstance(value, Node)
+
+
 ################
 # PARSE RESULT
 ################
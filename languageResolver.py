@@ -0,0 +1,143 @@
+import os
+
+import languageParser as lp
+from languageInterpreter import BUILTINS
+
+################
+# SCOPE
+################
+
+
+class Layout(dict):
+    __slots__ = ("positional", "reusable")
+
+
+class Scope:
+    def __init__(self, argNames):
+        self.layout = Layout()
+        self.nodes = []
+        for argName in argNames:
+            self.declare(argName)
+        self.layout.positional = all(self.layout.get(argName) == i for i, argName in enumerate(argNames))
+        self.layout.reusable = True
+
+    def declare(self, name):
+        if name not in BUILTINS and name not in self.layout:
+            self.layout[name] = len(self.layout)
+
+    def bind(self, node, name):
+        self.declare(name)
+        self.nodes.append((node, name))
+
+    def use(self, node, name):
+        self.nodes.append((node, name))
+
+    def close(self):
+        for node, name in self.nodes:
+            node.slot = self.layout.get(name)
+        return self.layout
+
+
+################
+# RESOLVER
+################
+
+
+class Resolver:
+    def resolve(self, node, scope=None):
+        method = getattr(self, f"resolve{type(node).__name__}", self.resolveChildren)
+        method(node, scope)
+
+    def resolveChildren(self, node, scope):
+        for _, value in node.fields():
+            self.resolveValue(value, scope)
+
+    def resolveValue(self, value, scope):
+        if isinstance(value, (list, tuple)):
+            for element in value:
+                self.resolveValue(element, scope)
+        elif lp.isNode(value):
+            self.resolve(value, scope)
+
+    def resolveVarAccessNode(self, node, scope):
+        if scope:
+            scope.use(node, node.varNameTkn.value)
+
+    def resolveVarAssignNode(self, node, scope):
+        if scope:
+            scope.bind(node, node.varNameTkn.value)
+        self.resolve(node.valueNode, scope)
+
+    def resolveListModifNode(self, node, scope):
+        if scope:
+            scope.declare(node.varNameTkn.value)
+        self.resolveChildren(node, scope)
+
+    def resolveForNode(self, node, scope):
+        if scope:
+            scope.bind(node, node.varNameTkn.value)
+        self.resolveChildren(node, scope)
+
+    def resolveForEachNode(self, node, scope):
+        if scope:
+            scope.bind(node, node.varNameTkn.value)
+        self.resolveChildren(node, scope)
+
+    def resolveIncludeNode(self, node, scope):
+        if scope:
+            scope.layout.reusable = False
+        if scope and node.moduleName:
+            scope.declare(node.moduleName)
+        elif scope and isinstance(node.fileNode, lp.StringNode):
+            scope.declare(os.path.basename(node.fileNode.tkn.value))
+        self.resolve(node.fileNode, scope)
+
+    def resolveClassNode(self, node, scope):
+        if scope:
+            scope.declare(node.varNameTkn.value)
+            scope.layout.reusable = False
+        self.resolve(node.bodyNode)
+
+    def resolveFuncDefNode(self, node, scope):
+        if scope:
+            scope.layout.reusable = False
+        if scope and node.varNameTkn:
+            scope.bind(node, node.varNameTkn.value)
+        if node.canMod:
+            self.resolve(node.bodyNode)
+        else:
+            bodyScope = Scope([argNameTkn.value for argNameTkn in node.argNameTkns])
+            self.resolve(node.bodyNode, bodyScope)
+            node.layout = bodyScope.close()
+        self.markTailCalls(node.bodyNode)
+        self.markTailReturns(node.bodyNode)
+
+    def markTailCalls(self, node):
+        if isinstance(node, lp.CallNode):
+            node.tail = True
+        elif isinstance(node, lp.BlockNode) and len(node.exprNodes) > 0:
+            self.markTailCalls(node.exprNodes[-1])
+        elif isinstance(node, lp.IfNode):
+            for _, expr in node.cases:
+                self.markTailCalls(expr)
+            if node.elseCase:
+                self.markTailCalls(node.elseCase)
+        elif isinstance(node, lp.ReturnNode):
+            self.markTailCalls(node.exprNode)
+
+    def markTailReturns(self, node):
+        if isinstance(node, lp.ReturnNode):
+            self.markTailCalls(node.exprNode)
+        elif isinstance(node, (lp.FuncDefNode, lp.ClassNode, lp.ForNode, lp.ForEachNode, lp.WhileNode)):
+            return
+        elif isinstance(node, lp.TryCatchNode):
+            self.markTailReturns(node.catchNode)
+            return
+        self.markTailReturnsIn(value for _, value in node.fields())
+
+    def markTailReturnsIn(self, values):
+        for value in values:
+            if isinstance(value, (list, tuple)):
+                self.markTailReturnsIn(value)
+            elif lp.isNode(value):
+                self.markTailReturns(value)
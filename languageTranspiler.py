@@ -0,0 +1,594 @@
+import sys
+
+from error import RTError
+import tokens as tok
+from values import NoneValue, Number, String, Function, List, TRUE, FALSE, NONE, BOOL_AND, BOOL_OR
+from languageInterpreter import Interpreter, BUILTINS, BreakSignal, ReturnSignal, TailCallSignal, cachedAccess, cachedLookup
+import languageParser as lp
+
+################
+# RUNTIME HELPERS
+################
+
+
+def setListItem(listValue, value, idxNodes, idxs, context):
+    subList = None
+    subListValue = listValue
+    for idxNode, idx in zip(idxNodes, idxs):
+        if not (isinstance(idx, Number) and isinstance(idx.value, int)):
+            raise RTError(
+                idxNode.startPos, idxNode.endPos,
+                "Index must be an int",
+                context
+            )
+        if idx.value >= len(subListValue.value) or idx.value < -len(subListValue.value):
+            raise RTError(
+                idxNode.startPos, idxNode.endPos,
+                "Index out of range",
+                context
+            )
+        subList = subListValue
+        if type(subList) is List:
+            subList.unshare()
+        subListValue = subList.value[idx.value]
+    subList.setItem(idx.value, value)
+
+
+def translateError(exc, node, context):
+    if isinstance(node, lp.BinOpNode) and isinstance(exc, ZeroDivisionError):
+        if node.opTkn.type == tok.TT_DIV:
+            return RTError(node.rNode.startPos, node.rNode.endPos, "Division by zero", context)
+        if node.opTkn.type == tok.TT_MOD:
+            return RTError(node.rNode.startPos, node.rNode.endPos, "Modulo by zero", context)
+    return RTError(node.startPos, node.endPos, f"{type(exc).__name__}: {exc}", context)
+
+
+################
+# UNIT
+################
+
+
+class Unit:
+    def __init__(self, fileName, source, lineNodes, namespace):
+        self.fileName = fileName
+        self.source = source
+        self.lineNodes = lineNodes
+        exec(compile(source, fileName, "exec"), namespace)
+        self.function = namespace["unit"]
+
+    def translate(self, exc, context):
+        node = self.lineNodes[0]
+        tb = exc.__traceback__
+        while tb is not None:
+            if tb.tb_frame.f_code.co_filename == self.fileName:
+                node = self.lineNodes[tb.tb_lineno - 1]
+            tb = tb.tb_next
+        return translateError(exc, node, context)
+
+    def __repr__(self):
+        return self.source
+
+
+################
+# TRANSPILER
+################
+
+
+FAST_OPERATIONS = {
+    tok.TT_PLUS: "Number({l}.value + {r}.value)",
+    tok.TT_MINUS: "Number({l}.value - {r}.value)",
+    tok.TT_MUL: "Number({l}.value * {r}.value)",
+    tok.TT_DIV: "Number({l}.value / {r}.value)",
+    tok.TT_MOD: "Number({l}.value % {r}.value)",
+    tok.TT_POW: "Number({l}.value ** {r}.value)",
+    tok.TT_EE: "(TRUE if {l}.value == {r}.value else FALSE)",
+    tok.TT_NE: "(TRUE if {l}.value != {r}.value else FALSE)",
+    tok.TT_LT: "(TRUE if {l}.value < {r}.value else FALSE)",
+    tok.TT_GT: "(TRUE if {l}.value > {r}.value else FALSE)",
+    tok.TT_LTE: "(TRUE if {l}.value <= {r}.value else FALSE)",
+    tok.TT_GTE: "(TRUE if {l}.value >= {r}.value else FALSE)"
+}
+
+RUNTIME_ERRORS = (RTError, ArithmeticError)
+
+
+class UnitGenerator:
+    unitCount = 0
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.lines = []
+        self.lineNodes = []
+        self.indent = 0
+        self.tempCount = 0
+        self.namespace = {}
+        self.constNames = {}
+        self.loopResults = []
+        self.loopNodes = []
+        self.usesSlots = False
+        self.node = None
+
+    def generate(self, node):
+        UnitGenerator.unitCount += 1
+        fileName = f"<ble unit {UnitGenerator.unitCount}: {node.startPos.fn if node.startPos else ''}>"
+        self.namespace.update({
+            "NoneValue": NoneValue, "Number": Number, "String": String,
+            "Function": Function, "List": List, "RTError": RTError, "TRUE": TRUE, "FALSE": FALSE, "NONE": NONE,
+            "BreakSignal": BreakSignal, "ReturnSignal": ReturnSignal, "TailCallSignal": TailCallSignal,
+            "RUNTIME_ERRORS": RUNTIME_ERRORS, "setListItem": setListItem, "cachedAccess": cachedAccess, "cachedLookup": cachedLookup,
+            "interpreter": self.interpreter, "sys": sys
+        })
+
+        self.node = node
+        self.emit("def unit(context):")
+        self.indent += 1
+        self.emit("symbolTable = context.symbolTable")
+        self.emit("symbols = symbolTable.symbols")
+        result = self.gen(node)
+        self.emit(f"return {result}")
+        if self.usesSlots:
+            self.lines.insert(3, "    slots = symbolTable.slots")
+            self.lineNodes.insert(3, node)
+        return Unit(fileName, "\n".join(self.lines) + "\n", self.lineNodes, self.namespace)
+
+    def emit(self, line):
+        self.lines.append("    " * self.indent + line)
+        self.lineNodes.append(self.node)
+
+    def temp(self):
+        self.tempCount += 1
+        return f"t{self.tempCount}"
+
+    def const(self, value):
+        name = self.constNames.get(id(value))
+        if name is None:
+            name = f"c{len(self.constNames)}"
+            self.constNames[id(value)] = name
+            self.namespace[name] = value
+        return name
+
+    def pos(self, node):
+        return f"{self.const(node.startPos)}, {self.const(node.endPos)}"
+
+    def gen(self, node):
+        parentNode = self.node
+        self.node = node
+        method = getattr(self, f"gen{type(node).__name__}", self.genFallback)
+        result = method(node)
+        self.node = parentNode
+        return result
+
+    def genBreak(self):
+        if len(self.loopResults) > 0:
+            self.emit(f"{self.loopResults[-1]} = NONE")
+            self.emit("break")
+        else:
+            self.emit("raise BreakSignal()")
+
+    def genFallback(self, node):
+        visitor = self.const(getattr(
+            self.interpreter, f"visit{type(node).__name__}", self.interpreter.noVisitMethod
+        ))
+        result = self.temp()
+        self.emit(f"{result} = {visitor}({self.const(node)}, context)")
+        return result
+
+    def genNumberNode(self, node):
+        return self.const(Number(node.tkn.value))
+
+    def genStringNode(self, node):
+        return self.const(String(node.tkn.value))
+
+    def genNoneValueNode(self, node):
+        return "NONE"
+
+    def genListNode(self, node):
+        elements = [self.gen(exprNode) for exprNode in node.exprNodes]
+        result = self.temp()
+        self.emit(f"{result} = List([{', '.join(elements)}])")
+        return result
+
+    def genVarAccessNode(self, node):
+        varName = node.varNameTkn.value
+        if varName == "true":
+            return "TRUE"
+        if varName == "false":
+            return "FALSE"
+        if varName in BUILTINS and varName not in ("module", "argv"):
+            return "NONE"
+
+        result = self.temp()
+        if varName == "module":
+            self.emit(f"{result} = String({node.startPos.module!r})")
+        elif varName == "argv":
+            self.emit(f"{result} = List([String(arg) for arg in sys.argv[1:]])")
+        elif node.slot is not None:
+            self.usesSlots = True
+            self.emit(f"{result} = slots[{node.slot}] or cachedLookup({self.const(node)}, symbolTable.parent) or NONE")
+        else:
+            self.emit(f"{result} = symbols.get({varName!r}) or cachedLookup({self.const(node)}, symbolTable) or NONE")
+        return result
+
+    def genVarAssignNode(self, node):
+        varName = node.varNameTkn.value
+        result = self.gen(node.valueNode)
+        self.genStore(node, varName, result)
+        return result
+
+    def genStore(self, node, varName, value, maybeNone=True):
+        if node.slot is not None:
+            self.usesSlots = True
+            if maybeNone:
+                self.emit(f"slots[{node.slot}] = None if type({value}) is NoneValue else {value}")
+            else:
+                self.emit(f"slots[{node.slot}] = {value}")
+        elif varName in BUILTINS:
+            return
+        elif maybeNone:
+            self.emit(f"symbolTable.set({varName!r}, {value})")
+        else:
+            self.emit(f"if {varName!r} in symbols:")
+            self.emit(f"    symbols[{varName!r}] = {value}")
+            self.emit("else:")
+            self.emit(f"    symbolTable.set({varName!r}, {value})")
+
+    def genBinOpNode(self, node):
+        result = self.temp()
+        left = self.gen(node.lNode)
+
+        if node.operator is None:
+            return self.genFallback(node)
+        operator = self.const(node.operator)
+
+        if node.operator is BOOL_AND or node.operator is BOOL_OR:
+            if node.operator is BOOL_AND:
+                self.emit(f"if {left}.isFalse():")
+                value = "FALSE"
+            else:
+                self.emit(f"if {left}.isTrue():")
+                value = "TRUE"
+            self.indent += 1
+            self.emit(f"{result} = {value}")
+            self.indent -= 1
+            self.emit("else:")
+            self.indent += 1
+            right = self.gen(node.rNode)
+            self.emit(f"{result}, err = {operator}.apply({left}, {right})")
+            self.emit("if err:")
+            self.emit(f"    raise err.build({self.const(node)}, context)")
+            self.indent -= 1
+            return result
+
+        right = self.gen(node.rNode)
+        self.emit(f"if type({left}) is Number and type({right}) is Number:")
+        self.indent += 1
+        fastOperation = FAST_OPERATIONS[node.opTkn.type].format(l=left, r=right)
+        self.emit(f"{result} = {fastOperation}")
+        self.indent -= 1
+        if node.opTkn.type == tok.TT_PLUS:
+            self.emit(f"elif type({left}) is String and type({right}) is String:")
+            self.indent += 1
+            self.emit(f"{result} = String({left}.value + {right}.value)")
+            self.indent -= 1
+        self.emit("else:")
+        self.indent += 1
+        self.emit(f"{result}, err = {operator}.apply({left}, {right})")
+        self.emit("if err:")
+        self.emit(f"    raise err.build({self.const(node)}, context)")
+        self.indent -= 1
+        return result
+
+    def genUnaryOpNode(self, node):
+        operand = self.gen(node.node)
+        if node.opTkn.type == tok.TT_MINUS:
+            operation = f"Number(0).subbedBy({operand})"
+        elif node.opTkn.type == tok.TT_PLUS:
+            operation = f"Number(0).addedTo({operand})"
+        elif node.opTkn.matches(tok.TT_KEYWORD, "not"):
+            operation = f"{operand}.boolNot()"
+        else:
+            return operand
+        result = self.temp()
+        self.emit(f"{result}, err = {operation}")
+        self.emit("if err:")
+        self.emit(f"    raise err.build({self.const(node)}, context)")
+        return result
+
+    def genListModifNode(self, node):
+        varNameTkn = node.varNameTkn
+        varName = varNameTkn.value
+        tknPos = f"{self.const(varNameTkn.startPos)}, {self.const(varNameTkn.endPos)}"
+        listValue = self.temp()
+        self.emit(f"{listValue} = symbolTable.get({varName!r})")
+        self.emit(f"if {listValue} is None:")
+        self.emit(f"    raise RTError({tknPos}, {varName + ' is not defined'!r}, context)")
+        self.emit(f"if not isinstance({listValue}, List):")
+        self.emit(f"    raise RTError({tknPos}, {varName + ' is not a list'!r}, context)")
+        value = self.gen(node.valueNode)
+        idxs = [self.gen(idxNode) for idxNode in node.idxNodes]
+        self.emit(f"setListItem({listValue}, {value}, {self.const(node.idxNodes)}, [{', '.join(idxs)}], context)")
+        self.emit(f"symbolTable.set({varName!r}, {listValue})")
+        return listValue
+
+    def genIfNode(self, node):
+        result = self.temp()
+        self.emit(f"{result} = None")
+        self.genCases(node.cases, result, 1)
+        return self.genElse(node, result)
+
+    def genCases(self, cases, result, unguarded):
+        for i, (cond, expr) in enumerate(cases):
+            if i >= unguarded:
+                self.emit(f"if {result} is None:")
+                self.indent += 1
+            condValue = self.gen(cond)
+            self.emit(f"if {condValue}.isTrue():")
+            self.indent += 1
+            self.emit(f"{result} = {self.gen(expr)}")
+            self.indent -= 1
+            if i >= unguarded:
+                self.indent -= 1
+
+    def genSwitchNode(self, node):
+        subject = self.gen(node.subject)
+        case = self.temp()
+        result = self.temp()
+        self.emit(f"{result} = None")
+        self.emit(
+            f"{case} = {self.const(node.table)}.get({subject}.value, -1) "
+            f"if type({subject}) is {self.const(node.valueType)} else -2"
+        )
+        self.emit(f"if {case} >= 0:")
+        self.indent += 1
+        self.genJumpTable(node.cases, case, result, 0, node.size)
+        self.indent -= 1
+        self.emit(f"elif {case} == -2:")
+        self.indent += 1
+        self.genCases(node.cases[:node.size], result, 1)
+        self.indent -= 1
+        self.genCases(node.cases[node.size:], result, 0)
+        return self.genElse(node, result)
+
+    def genJumpTable(self, cases, case, result, low, high):
+        if high - low == 1:
+            self.emit(f"{result} = {self.gen(cases[low][1])}")
+            return
+        middle = (low + high) // 2
+        self.emit(f"if {case} < {middle}:")
+        self.indent += 1
+        self.genJumpTable(cases, case, result, low, middle)
+        self.indent -= 1
+        self.emit("else:")
+        self.indent += 1
+        self.genJumpTable(cases, case, result, middle, high)
+        self.indent -= 1
+
+    def genElse(self, node, result):
+        self.emit(f"if {result} is None:")
+        self.indent += 1
+        if node.elseCase:
+            self.emit(f"{result} = {self.gen(node.elseCase)}")
+        else:
+            self.emit(f"{result} = NONE")
+        self.indent -= 1
+        return result
+
+    def genExpectInt(self, value, node):
+        self.emit(f"if not isinstance({value}, Number) or not isinstance({value}.value, int):")
+        self.emit(f"    raise RTError({self.pos(node)}, 'Expected int', context)")
+
+    def genLoopBody(self, node, result):
+        self.loopResults.append(result)
+        self.loopNodes.append(node)
+        self.emit(f"{result} = {self.gen(node.bodyNode)}")
+        self.loopResults.pop()
+        self.loopNodes.pop()
+
+    def genLoopStart(self, node, result):
+        done = self.temp()
+        if node.elseNode:
+            self.emit(f"{done} = False")
+        self.emit("try:")
+        self.indent += 1
+        return done
+
+    def genLoopEnd(self, node, result, done):
+        self.indent -= 1
+        self.emit("except BreakSignal:")
+        self.emit(f"    {result} = NONE")
+        if node.elseNode:
+            self.emit(f"if {done}:")
+            self.indent += 1
+            self.emit(f"{result} = {self.gen(node.elseNode)}")
+            self.indent -= 1
+
+    def genForElse(self, node, done):
+        if node.elseNode:
+            self.emit("else:")
+            self.emit(f"    {done} = True")
+
+    def genForNode(self, node):
+        result = self.temp()
+        self.emit(f"{result} = NONE")
+        startValue = self.gen(node.startValueNode)
+        self.genExpectInt(startValue, node)
+        endValue = self.gen(node.endValueNode)
+        self.genExpectInt(endValue, node)
+        if node.stepValueNode:
+            stepValue = self.gen(node.stepValueNode)
+            self.genExpectInt(stepValue, node)
+            step = f"{stepValue}.value"
+        else:
+            step = "1"
+
+        i = self.temp()
+        done = self.genLoopStart(node, result)
+        self.emit(f"for {i} in range({startValue}.value, {endValue}.value, {step}):")
+        self.indent += 1
+        self.genStore(node, node.varNameTkn.value, f"Number({i})", False)
+        self.genLoopBody(node, result)
+        self.indent -= 1
+        self.genForElse(node, done)
+        self.genLoopEnd(node, result, done)
+        return result
+
+    def genForEachNode(self, node):
+        result = self.temp()
+        self.emit(f"{result} = NONE")
+        listExpr = self.gen(node.listNode)
+        self.emit(f"if not isinstance({listExpr}, List) and not isinstance({listExpr}, String):")
+        self.emit(f"    raise RTError({self.pos(node)}, 'Expected list or string in for each', context)")
+        self.emit(f"if type({listExpr}) is List:")
+        self.emit(f"    {listExpr}.unshare()")
+
+        elem = self.temp()
+        done = self.genLoopStart(node, result)
+        self.emit(f"for {elem} in {listExpr}.value:")
+        self.indent += 1
+        self.emit(f"{elem} = String({elem}) if type({elem}) is str else {elem}")
+        self.genStore(node, node.varNameTkn.value, elem)
+        self.genLoopBody(node, result)
+        self.indent -= 1
+        self.genForElse(node, done)
+        self.genLoopEnd(node, result, done)
+        return result
+
+    def genWhileNode(self, node):
+        result = self.temp()
+        self.emit(f"{result} = NONE")
+        done = self.genLoopStart(node, result)
+        self.emit("while True:")
+        self.indent += 1
+        self.loopResults.append(result)
+        self.loopNodes.append(node)
+        cond = self.gen(node.condNode)
+        self.loopResults.pop()
+        self.loopNodes.pop()
+        self.emit(f"if not {cond}.isTrue():")
+        if node.elseNode:
+            self.emit(f"    {done} = True")
+        self.emit("    break")
+        self.genLoopBody(node, result)
+        self.indent -= 1
+        self.genLoopEnd(node, result, done)
+        return result
+
+    def genBreakNode(self, node):
+        self.genBreak()
+        return "None"
+
+    def genReturnNode(self, node):
+        value = self.gen(node.exprNode)
+        self.emit(f"raise ReturnSignal({value})")
+        return "None"
+
+    def genBlockNode(self, node):
+        if len(node.exprNodes) == 0:
+            result = self.temp()
+            self.emit(f"{result} = NONE")
+            return result
+        for exprNode in node.exprNodes:
+            result = self.gen(exprNode)
+        return result
+
+    def genFuncDefNode(self, node):
+        funcName = node.varNameTkn.value if node.varNameTkn else None
+        argNames = [argName.value for argName in node.argNameTkns]
+        result = self.temp()
+        self.emit(
+            f"{result} = Function({funcName!r}, {self.const(node.bodyNode)}, {argNames!r}, "
+            f"{node.canMod!r}, {node.isBuiltin!r}, {self.const(node.layout)}).setContext(context)"
+        )
+        if node.varNameTkn:
+            self.genStore(node, funcName, result, False)
+        return result
+
+    def genCallNode(self, node):
+        valueToCall = self.gen(node.nodeToCall)
+        args = [self.gen(argNode) for argNode in node.argNodes]
+        if node.tail:
+            self.emit(
+                f"raise TailCallSignal({valueToCall}, [{', '.join(args)}], "
+                f"context if {valueToCall}.context is None else {valueToCall}.context, {self.const(node)})"
+            )
+            return "None"
+        result = self.temp()
+        self.emit(
+            f"{result} = {valueToCall}.execute([{', '.join(args)}], "
+            f"context if {valueToCall}.context is None else {valueToCall}.context, {self.const(node)}, interpreter)"
+        )
+        return result
+
+    def genInlineCallNode(self, node):
+        callNode = node.callNode
+        valueToCall = self.gen(callNode.nodeToCall)
+        result = self.temp()
+        self.emit(f"{result} = None")
+        self.emit(f"if type({valueToCall}) is Function and {valueToCall}.bodyNode is {self.const(node.calleeBody)}:")
+        self.indent += 1
+        self.emit("try:")
+        self.indent += 1
+        self.emit(f"{result} = {self.gen(node.expansion)}")
+        self.indent -= 1
+        self.emit("except RUNTIME_ERRORS:")
+        self.emit("    pass")
+        self.indent -= 1
+        self.emit(f"if {result} is None:")
+        self.indent += 1
+        args = [self.gen(argNode) for argNode in callNode.argNodes]
+        self.emit(
+            f"{result} = {valueToCall}.execute([{', '.join(args)}], "
+            f"context if {valueToCall}.context is None else {valueToCall}.context, {self.const(callNode)}, interpreter)"
+        )
+        self.indent -= 1
+        return result
+
+    def genAccessNode(self, node):
+        module = self.gen(node.moduleNode)
+        result = self.temp()
+        self.emit(f"{result} = cachedAccess({self.const(node)}, {module}, context)")
+        return result
+
+    def genDispNode(self, node):
+        value = self.gen(node.bodyNode)
+        end = "\n" if node.newLine else ""
+        self.emit(f"print({value}, end={end!r})")
+        return value
+
+    def genTryCatchNode(self, node):
+        result = self.temp()
+        self.emit("try:")
+        self.indent += 1
+        self.emit(f"{result} = {self.gen(node.tryNode)}")
+        self.indent -= 1
+        self.emit("except RUNTIME_ERRORS:")
+        self.indent += 1
+        self.emit(f"{result} = {self.gen(node.catchNode)}")
+        self.indent -= 1
+        return result
+
+
+class Transpiler(Interpreter):
+    engine = "python"
+    quickening = False
+    tiering = False
+
+    def transpile(self, node):
+        unit = getattr(node, "unit", None)
+        if unit is None:
+            try:
+                unit = UnitGenerator(self).generate(node)
+            except (SyntaxError, RecursionError, MemoryError):
+                unit = False
+            node.unit = unit
+        return unit
+
+    def visit(self, node, context):
+        unit = self.transpile(node)
+        if unit is False:
+            return super().visit(node, context)
+
+        try:
+            return unit.function(context)
+        except ArithmeticError as exc:
+            raise unit.translate(exc, context) from None
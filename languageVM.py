@@ -0,0 +1,647 @@
+from error import RTError
+import tokens as tok
+import values
+from values import NoneValue, Number, String, Function, List, Class, TRUE, FALSE, NONE, BOOL_AND, BOOL_OR
+from languageInterpreter import Interpreter, BUILTINS, BreakSignal, ReturnSignal, cachedAccess, cachedLookup
+
+################
+# OPCODES
+################
+
+OP_LOAD = 0
+OP_STORE = 1
+OP_POP = 2
+OP_CONST = 3
+OP_BINARY = 4
+OP_POP_JUMP_IF_FALSE = 5
+OP_JUMP = 6
+OP_CALL = 7
+OP_REPLACE = 8
+OP_FOR_ITER = 9
+OP_FOREACH_ITER = 10
+OP_ACCESS = 11
+OP_AND = 12
+OP_OR = 13
+OP_UNARY = 14
+OP_RETURN = 15
+OP_END = 16
+OP_LIST = 17
+OP_FUNC_DEF = 18
+OP_SETUP_LOOP = 19
+OP_SETUP_TRY = 20
+OP_POP_BLOCK = 21
+OP_BREAK = 22
+OP_EXPECT_INT = 23
+OP_FOR_PREP = 24
+OP_FOREACH_PREP = 25
+OP_LIST_MODIF_PREP = 26
+OP_LIST_MODIF = 27
+OP_DISP = 28
+OP_EVAL = 29
+OP_LOAD_SLOT = 30
+OP_STORE_SLOT = 31
+OP_BINARY_TYPED = 32
+OP_INLINE_GUARD = 33
+OP_SWITCH = 34
+
+OPNAMES = {
+    value: name for name, value in globals().items() if name.startswith("OP_")
+}
+
+BLOCK_LOOP = 0
+BLOCK_TRY = 1
+
+
+################
+# CODE
+################
+
+
+class Code:
+    def __init__(self, name, instructions):
+        self.name = name
+        self.instructions = instructions
+
+    def __repr__(self):
+        res = f"<code {self.name}>\n"
+        for i, (op, arg) in enumerate(self.instructions):
+            res += f"{i:>6} {OPNAMES[op]:<20} {'' if arg is None else arg}\n"
+        return res
+
+
+################
+# BYTECODE COMPILER
+################
+
+
+class BytecodeCompiler:
+    def __init__(self):
+        self.instructions = []
+
+    def compile(self, node, name):
+        self.instructions = []
+        self.emitNode(node)
+        self.emit(OP_END)
+        return Code(name, self.instructions)
+
+    def emit(self, op, arg=None):
+        self.instructions.append((op, arg))
+        return len(self.instructions) - 1
+
+    def label(self):
+        return len(self.instructions)
+
+    def patch(self, idx, arg):
+        op, _ = self.instructions[idx]
+        self.instructions[idx] = (op, arg)
+
+    def emitNode(self, node):
+        methodName = f"emit{type(node).__name__}"
+        method = getattr(self, methodName, self.emitFallback)
+        method(node)
+
+    def emitFallback(self, node):
+        self.emit(OP_EVAL, node)
+
+    def emitNumberNode(self, node):
+        self.emit(OP_CONST, Number(node.tkn.value))
+
+    def emitStringNode(self, node):
+        self.emit(OP_CONST, String(node.tkn.value))
+
+    def emitNoneValueNode(self, node):
+        self.emit(OP_CONST, NONE)
+
+    def emitListNode(self, node):
+        for exprNode in node.exprNodes:
+            self.emitNode(exprNode)
+        self.emit(OP_LIST, len(node.exprNodes))
+
+    def emitVarAccessNode(self, node):
+        varName = node.varNameTkn.value
+        if varName == "true":
+            self.emit(OP_CONST, TRUE)
+        elif varName == "false":
+            self.emit(OP_CONST, FALSE)
+        elif varName == "module":
+            self.emit(OP_CONST, String(node.startPos.module))
+        elif varName == "none":
+            self.emit(OP_CONST, NONE)
+        elif varName in BUILTINS:
+            self.emitFallback(node)
+        elif node.slot is None:
+            self.emit(OP_LOAD, node)
+        else:
+            self.emit(OP_LOAD_SLOT, (node.slot, node))
+
+    def emitVarAssignNode(self, node):
+        self.emitNode(node.valueNode)
+        varName = node.varNameTkn.value
+        if node.slot is not None:
+            self.emit(OP_STORE_SLOT, node.slot)
+        elif varName not in BUILTINS:
+            self.emit(OP_STORE, varName)
+
+    def emitBinOpNode(self, node):
+        if node.operator is None:
+            self.emitFallback(node)
+            return
+        if node.operator is BOOL_AND:
+            shortCircuit = OP_AND
+        elif node.operator is BOOL_OR:
+            shortCircuit = OP_OR
+        else:
+            shortCircuit = None
+
+        self.emitNode(node.lNode)
+        if shortCircuit is not None:
+            jump = self.emit(shortCircuit)
+        self.emitNode(node.rNode)
+        if node.operandTypes is None:
+            self.emit(OP_BINARY, (node.operator.apply, node))
+        else:
+            leftType, rightType = node.operandTypes
+            handler = node.operator.specialize(leftType, rightType)
+            self.emit(OP_BINARY_TYPED, (handler, leftType, rightType, node.operator.apply, node))
+        if shortCircuit is not None:
+            self.patch(jump, self.label())
+
+    def emitUnaryOpNode(self, node):
+        self.emitNode(node.node)
+        if node.opTkn.type == tok.TT_MINUS:
+            kind = "subbedBy"
+        elif node.opTkn.type == tok.TT_PLUS:
+            kind = "addedTo"
+        elif node.opTkn.matches(tok.TT_KEYWORD, "not"):
+            kind = "boolNot"
+        else:
+            kind = None
+        self.emit(OP_UNARY, (kind, node))
+
+    def emitListModifNode(self, node):
+        self.emit(OP_LIST_MODIF_PREP, node.varNameTkn)
+        self.emitNode(node.valueNode)
+        for idxNode in node.idxNodes:
+            self.emitNode(idxNode)
+        self.emit(OP_LIST_MODIF, (node.varNameTkn.value, node.idxNodes))
+
+    def emitIfNode(self, node):
+        endJumps = []
+        condLabels = []
+        exprLabels = []
+        for cond, expr in node.cases:
+            condLabels.append(self.label())
+            self.emitNode(cond)
+            nextJump = self.emit(OP_POP_JUMP_IF_FALSE)
+            exprLabels.append(self.label())
+            self.emitNode(expr)
+            endJumps.append(self.emit(OP_JUMP))
+            self.patch(nextJump, self.label())
+        condLabels.append(self.label())
+        if node.elseCase:
+            self.emitNode(node.elseCase)
+        else:
+            self.emit(OP_CONST, NONE)
+        for jump in endJumps:
+            self.patch(jump, self.label())
+        return condLabels, exprLabels
+
+    def emitSwitchNode(self, node):
+        self.emitNode(node.subject)
+        switch = self.emit(OP_SWITCH)
+        condLabels, exprLabels = self.emitIfNode(node)
+        targets = {key: exprLabels[case] for key, case in node.table.items()}
+        self.patch(switch, (node.valueType, targets, condLabels[node.size]))
+
+    def emitLoopEnd(self, node, setup):
+        self.emit(OP_POP_BLOCK)
+        if node.elseNode:
+            self.emit(OP_POP)
+            self.emitNode(node.elseNode)
+        self.patch(setup, self.label())
+
+    def emitForNode(self, node):
+        setup = self.emit(OP_SETUP_LOOP)
+        self.emit(OP_CONST, NONE)
+        self.emitNode(node.startValueNode)
+        self.emit(OP_EXPECT_INT, (node.startPos, node.endPos))
+        self.emitNode(node.endValueNode)
+        self.emit(OP_EXPECT_INT, (node.startPos, node.endPos))
+        if node.stepValueNode:
+            self.emitNode(node.stepValueNode)
+        else:
+            self.emit(OP_CONST, Number(1))
+        self.emit(OP_EXPECT_INT, (node.startPos, node.endPos))
+        self.emit(OP_FOR_PREP)
+        start = self.emit(OP_FOR_ITER)
+        self.emitNode(node.bodyNode)
+        self.emit(OP_REPLACE, 2)
+        self.emit(OP_JUMP, start)
+        self.patch(start, (self.label(), node.varNameTkn.value, node.slot))
+        self.emitLoopEnd(node, setup)
+
+    def emitForEachNode(self, node):
+        setup = self.emit(OP_SETUP_LOOP)
+        self.emit(OP_CONST, NONE)
+        self.emitNode(node.listNode)
+        self.emit(OP_FOREACH_PREP, (node.startPos, node.endPos))
+        start = self.emit(OP_FOREACH_ITER)
+        self.emitNode(node.bodyNode)
+        self.emit(OP_REPLACE, 2)
+        self.emit(OP_JUMP, start)
+        self.patch(start, (self.label(), node.varNameTkn.value, node.slot))
+        self.emitLoopEnd(node, setup)
+
+    def emitWhileNode(self, node):
+        setup = self.emit(OP_SETUP_LOOP)
+        self.emit(OP_CONST, NONE)
+        start = self.label()
+        self.emitNode(node.condNode)
+        exitJump = self.emit(OP_POP_JUMP_IF_FALSE)
+        self.emitNode(node.bodyNode)
+        self.emit(OP_REPLACE, 1)
+        self.emit(OP_JUMP, start)
+        self.patch(exitJump, self.label())
+        self.emitLoopEnd(node, setup)
+
+    def emitBreakNode(self, node):
+        self.emit(OP_BREAK)
+
+    def emitReturnNode(self, node):
+        self.emitNode(node.exprNode)
+        self.emit(OP_RETURN)
+
+    def emitBlockNode(self, node):
+        if len(node.exprNodes) == 0:
+            self.emit(OP_CONST, NONE)
+            return
+        for i, exprNode in enumerate(node.exprNodes):
+            if i > 0:
+                self.emit(OP_POP)
+            self.emitNode(exprNode)
+
+    def emitFuncDefNode(self, node):
+        funcName = node.varNameTkn.value if node.varNameTkn else None
+        self.emit(OP_FUNC_DEF, (
+            funcName, node.bodyNode,
+            [argName.value for argName in node.argNameTkns],
+            node.canMod, node.isBuiltin, node.layout,
+            node.varNameTkn is not None and funcName not in BUILTINS, node.slot
+        ))
+
+    def emitCallNode(self, node):
+        self.emitNode(node.nodeToCall)
+        for argNode in node.argNodes:
+            self.emitNode(argNode)
+        self.emit(OP_CALL, (len(node.argNodes), node.tail, node))
+
+    def emitInlineCallNode(self, node):
+        callNode = node.callNode
+        self.emitNode(callNode.nodeToCall)
+        guard = self.emit(OP_INLINE_GUARD)
+        setup = self.emit(OP_SETUP_TRY)
+        self.emitNode(node.expansion)
+        self.emit(OP_POP_BLOCK)
+        self.emit(OP_REPLACE, 1)
+        endJump = self.emit(OP_JUMP)
+        self.patch(guard, (node.calleeBody, self.label()))
+        self.patch(setup, self.label())
+        for argNode in callNode.argNodes:
+            self.emitNode(argNode)
+        self.emit(OP_CALL, (len(callNode.argNodes), False, callNode))
+        self.patch(endJump, self.label())
+
+    def emitAccessNode(self, node):
+        self.emitNode(node.moduleNode)
+        self.emit(OP_ACCESS, node)
+
+    def emitDispNode(self, node):
+        self.emitNode(node.bodyNode)
+        self.emit(OP_DISP, "\n" if node.newLine else "")
+
+    def emitTryCatchNode(self, node):
+        setup = self.emit(OP_SETUP_TRY)
+        self.emitNode(node.tryNode)
+        self.emit(OP_POP_BLOCK)
+        endJump = self.emit(OP_JUMP)
+        self.patch(setup, self.label())
+        self.emitNode(node.catchNode)
+        self.patch(endJump, self.label())
+
+
+################
+# VIRTUAL MACHINE
+################
+
+
+class VM(Interpreter):
+    engine = "vm"
+    quickening = False
+    tiering = False
+
+    def __init__(self, dev, optimize=True):
+        super().__init__(dev, optimize)
+        self.compiler = BytecodeCompiler()
+
+    def compile(self, node, name="<program>"):
+        code = getattr(node, "code", None)
+        if code is None:
+            code = self.compiler.compile(node, name)
+            node.code = code
+        return code
+
+    def visit(self, node, context):
+        return self.run(self.compile(node), context)
+
+    def run(self, code, context):
+        callDepth = values.callDepth
+        try:
+            return self.runFrames(code, context)
+        finally:
+            values.callDepth = callDepth
+
+    def runFrames(self, code, context):
+        frames = []
+        instructions = code.instructions
+        pc = 0
+        stack = []
+        blocks = []
+
+        while True:
+            try:
+                while True:
+                    op, arg = instructions[pc]
+                    pc += 1
+
+                    if op == OP_LOAD:
+                        value = cachedLookup(arg, context.symbolTable)
+                        stack.append(NONE if value is None else value)
+                    elif op == OP_LOAD_SLOT:
+                        slot, node = arg
+                        value = context.symbolTable.slots[slot]
+                        if value is None:
+                            value = cachedLookup(node, context.symbolTable.parent)
+                            if value is None:
+                                value = NONE
+                        stack.append(value)
+                    elif op == OP_STORE:
+                        context.symbolTable.set(arg, stack[-1])
+                    elif op == OP_STORE_SLOT:
+                        value = stack[-1]
+                        context.symbolTable.slots[arg] = None if isinstance(value, NoneValue) else value
+                    elif op == OP_POP:
+                        stack.pop()
+                    elif op == OP_CONST:
+                        stack.append(arg)
+                    elif op == OP_BINARY:
+                        apply, node = arg
+                        right = stack.pop()
+                        result, err = apply(stack[-1], right)
+                        if err:
+                            raise err.build(node, context)
+                        stack[-1] = result
+                    elif op == OP_BINARY_TYPED:
+                        handler, leftType, rightType, apply, node = arg
+                        right = stack.pop()
+                        if type(stack[-1]) is leftType and type(right) is rightType:
+                            result, err = handler(stack[-1], right)
+                        else:
+                            result, err = apply(stack[-1], right)
+                        if err:
+                            raise err.build(node, context)
+                        stack[-1] = result
+                    elif op == OP_POP_JUMP_IF_FALSE:
+                        if not stack.pop().isTrue():
+                            pc = arg
+                    elif op == OP_JUMP:
+                        pc = arg
+                    elif op == OP_SWITCH:
+                        valueType, targets, miss = arg
+                        value = stack.pop()
+                        if type(value) is valueType:
+                            pc = targets.get(value.value, miss)
+                    elif op == OP_REPLACE:
+                        stack[-arg] = stack.pop()
+                    elif op == OP_FOR_ITER:
+                        i = next(stack[-1], None)
+                        if i is None:
+                            stack.pop()
+                            pc = arg[0]
+                        elif arg[2] is not None:
+                            context.symbolTable.slots[arg[2]] = Number(i)
+                        elif arg[1] in context.symbolTable.symbols:
+                            context.symbolTable.symbols[arg[1]] = Number(i)
+                        else:
+                            context.symbolTable.set(arg[1], Number(i))
+                    elif op == OP_CALL:
+                        argc, tail, node = arg
+                        args = stack[len(stack) - argc:]
+                        del stack[len(stack) - argc:]
+                        valueToCall = stack.pop()
+                        callContext = context if valueToCall.context is None else valueToCall.context
+                        instance = None
+
+                        if type(valueToCall) is Class:
+                            constructor = valueToCall.classContext.symbolTable.symbols.get(valueToCall.name, None)
+                            if type(constructor) is Function:
+                                instance = valueToCall.copy()
+                                valueToCall = instance.classContext.symbolTable.symbols[instance.name]
+                                callContext = instance.classContext
+                                tail = False
+
+                        if type(valueToCall) is Function:
+                            if not tail and values.callDepth >= values.RECURSION_LIMIT:
+                                raise RTError(
+                                    node.startPos, node.endPos,
+                                    "Maximum recursion depth exceeded",
+                                    context
+                                )
+                            newContext = valueToCall.makeContext(args, callContext, node)
+                            if not tail:
+                                frames.append((instructions, pc, stack, blocks, context, instance))
+                                values.callDepth += 1
+                            instructions = self.compile(
+                                valueToCall.bodyNode, valueToCall.name
+                            ).instructions
+                            pc = 0
+                            stack = []
+                            blocks = []
+                            context = newContext
+                        else:
+                            stack.append(valueToCall.execute(args, callContext, node, self))
+                    elif op == OP_FOREACH_ITER:
+                        elem = next(stack[-1], None)
+                        if elem is None:
+                            stack.pop()
+                            pc = arg[0]
+                        else:
+                            if isinstance(elem, str):
+                                elem = String(elem)
+                            if arg[2] is None:
+                                context.symbolTable.set(arg[1], elem)
+                            else:
+                                context.symbolTable.slots[arg[2]] = None if isinstance(elem, NoneValue) else elem
+                    elif op == OP_INLINE_GUARD:
+                        calleeBody, fallback = arg
+                        value = stack[-1]
+                        if type(value) is not Function or value.bodyNode is not calleeBody:
+                            pc = fallback
+                    elif op == OP_ACCESS:
+                        stack[-1] = cachedAccess(arg, stack[-1], context)
+                    elif op == OP_AND or op == OP_OR:
+                        left = stack[-1]
+                        if op == OP_AND and left.isFalse():
+                            stack[-1] = FALSE
+                            pc = arg
+                        elif op == OP_OR and left.isTrue():
+                            stack[-1] = TRUE
+                            pc = arg
+                    elif op == OP_UNARY:
+                        kind, node = arg
+                        value = stack[-1]
+                        err = None
+                        if kind == "boolNot":
+                            value, err = value.boolNot()
+                        elif kind is not None:
+                            value, err = getattr(Number(0), kind)(value)
+                        if err:
+                            raise err.build(node, context)
+                        stack[-1] = value
+                    elif op == OP_RETURN or op == OP_END:
+                        value = stack.pop()
+                        if len(frames) == 0:
+                            if op == OP_RETURN:
+                                raise ReturnSignal(value)
+                            return value
+                        instructions, pc, stack, blocks, context, instance = frames.pop()
+                        values.callDepth -= 1
+                        stack.append(value if instance is None else instance)
+                    elif op == OP_LIST:
+                        elements = stack[len(stack) - arg:]
+                        del stack[len(stack) - arg:]
+                        stack.append(List(elements))
+                    elif op == OP_FUNC_DEF:
+                        funcName, bodyNode, argNames, canMod, isBuiltin, layout, bindName, slot = arg
+                        funcValue = Function(
+                            funcName, bodyNode, argNames, canMod, isBuiltin, layout
+                        ).setContext(context)
+                        if slot is not None:
+                            context.symbolTable.slots[slot] = funcValue
+                        elif bindName:
+                            context.symbolTable.set(funcName, funcValue)
+                        stack.append(funcValue)
+                    elif op == OP_SETUP_LOOP:
+                        blocks.append((BLOCK_LOOP, arg, len(stack)))
+                    elif op == OP_SETUP_TRY:
+                        blocks.append((BLOCK_TRY, arg, len(stack)))
+                    elif op == OP_POP_BLOCK:
+                        blocks.pop()
+                    elif op == OP_BREAK:
+                        raise BreakSignal()
+                    elif op == OP_EXPECT_INT:
+                        value = stack[-1]
+                        if not isinstance(value, Number) or not isinstance(value.value, int):
+                            startPos, endPos = arg
+                            raise RTError(
+                                startPos, endPos,
+                                "Expected int",
+                                context
+                            )
+                    elif op == OP_FOR_PREP:
+                        step = stack.pop().value
+                        end = stack.pop().value
+                        stack[-1] = iter(range(stack[-1].value, end, step))
+                    elif op == OP_FOREACH_PREP:
+                        listExpr = stack[-1]
+                        if not isinstance(listExpr, List) and not isinstance(listExpr, String):
+                            startPos, endPos = arg
+                            raise RTError(
+                                startPos, endPos,
+                                "Expected list or string in for each",
+                                context
+                            )
+                        if isinstance(listExpr, List):
+                            listExpr.unshare()
+                        stack[-1] = iter(listExpr.value)
+                    elif op == OP_LIST_MODIF_PREP:
+                        varNameTkn = arg
+                        listValue = context.symbolTable.get(varNameTkn.value)
+                        if listValue is None:
+                            raise RTError(
+                                varNameTkn.startPos, varNameTkn.endPos,
+                                f"{varNameTkn.value} is not defined",
+                                context
+                            )
+                        if not isinstance(listValue, List):
+                            raise RTError(
+                                varNameTkn.startPos, varNameTkn.endPos,
+                                f"{varNameTkn.value} is not a list",
+                                context
+                            )
+                        stack.append(listValue)
+                    elif op == OP_LIST_MODIF:
+                        varName, idxNodes = arg
+                        idxs = stack[len(stack) - len(idxNodes):]
+                        del stack[len(stack) - len(idxNodes):]
+                        value = stack.pop()
+                        listValue = stack[-1]
+                        subList = None
+                        subListValue = listValue
+                        for idxNode, idx in zip(idxNodes, idxs):
+                            if not (isinstance(idx, Number) and isinstance(idx.value, int)):
+                                raise RTError(
+                                    idxNode.startPos, idxNode.endPos,
+                                    "Index must be an int",
+                                    context
+                                )
+                            if idx.value >= len(subListValue.value) or idx.value < -len(subListValue.value):
+                                raise RTError(
+                                    idxNode.startPos, idxNode.endPos,
+                                    "Index out of range",
+                                    context
+                                )
+                            subList = subListValue
+                            if type(subList) is List:
+                                subList.unshare()
+                            subListValue = subList.value[idx.value]
+                        subList.setItem(idx.value, value)
+                        context.symbolTable.set(varName, listValue)
+                    elif op == OP_DISP:
+                        print(stack[-1], end=arg)
+                    elif op == OP_EVAL:
+                        stack.append(
+                            getattr(self, f"visit{type(arg).__name__}", self.noVisitMethod)(arg, context)
+                        )
+                    else:
+                        raise Exception(f"Unknown opcode {op}")
+            except RTError as err:
+                while True:
+                    while len(blocks) > 0 and blocks[-1][0] != BLOCK_TRY:
+                        blocks.pop()
+                    if len(blocks) > 0 or len(frames) == 0:
+                        break
+                    instructions, pc, stack, blocks, context, _ = frames.pop()
+                    values.callDepth -= 1
+                if len(blocks) == 0:
+                    raise
+                _, pc, depth = blocks.pop()
+                del stack[depth:]
+            except ReturnSignal as ret:
+                if len(frames) == 0:
+                    raise
+                instructions, pc, stack, blocks, context, instance = frames.pop()
+                values.callDepth -= 1
+                stack.append(ret.value if instance is None else instance)
+            except BreakSignal:
+                while True:
+                    while len(blocks) > 0 and blocks[-1][0] != BLOCK_LOOP:
+                        blocks.pop()
+                    if len(blocks) > 0 or len(frames) == 0:
+                        break
+                    instructions, pc, stack, blocks, context, _ = frames.pop()
+                    values.callDepth -= 1
+                if len(blocks) == 0:
+                    raise
+                _, pc, depth = blocks.pop()
+                del stack[depth:]
+                stack.append(NONE)
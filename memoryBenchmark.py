@@ -0,0 +1,83 @@
+import os
+import resource
+import subprocess
+import sys
+
+import language
+from languageLexer import Lexer
+from languageParser import Parser
+
+"""
+Reports the peak resident set size of parsing and running the lib/ modules.
+Each measurement runs in a fresh process so that phases do not share a peak.
+
+usage: python memoryBenchmark.py [--repeat=<n>] [--engine=<name>] [file ...]
+"""
+
+################
+# MEASURE
+################
+
+
+LIB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lib")
+PHASES = ("baseline", "parse", "run")
+
+
+def peakRss():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak // 1024
+    return peak
+
+
+def measure(phase, fn, repeat, engine):
+    with open(fn) as f:
+        text = f.read()
+
+    results = []
+    for _ in range(repeat):
+        if phase == "parse":
+            tokens, err = Lexer(fn, text, "<main>").makeTokens()
+            if err is None:
+                results.append(Parser(tokens).parse())
+        elif phase == "run":
+            results.append(language.run(fn, text, engine=engine))
+    return peakRss()
+
+
+def spawn(phase, fn, repeat, engine):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), f"--phase={phase}",
+         f"--repeat={repeat}", f"--engine={engine}", fn],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return int(output.split()[-1])
+
+
+################
+# MAIN
+################
+
+
+options = {}
+while len(sys.argv) > 1 and sys.argv[1].startswith("--"):
+    option, _, optionValue = sys.argv.pop(1)[2:].partition("=")
+    options[option] = optionValue
+
+repeat = int(options.get("repeat", "20"))
+engine = options.get("engine", "interpreter")
+files = sys.argv[1:] or sorted(
+    os.path.join(LIB_DIR, name) for name in os.listdir(LIB_DIR) if name.endswith(".ble")
+)
+
+if "phase" in options:
+    print(measure(options["phase"], files[0], repeat, engine))
+else:
+    print(f"peak RSS in KiB, {repeat} repetitions, engine {engine}")
+    print(f"{'module':<16}{'baseline':>10}{'parse':>10}{'+parse':>10}{'run':>10}{'+run':>10}")
+    for fn in files:
+        baseline, parse, run = (spawn(phase, fn, repeat, engine) for phase in PHASES)
+        print(
+            f"{os.path.basename(fn):<16}{baseline:>10}{parse:>10}{parse - baseline:>10}"
+            f"{run:>10}{run - baseline:>10}"
+        )
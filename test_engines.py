@@ -0,0 +1,670 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+"""
+Runs BLE programs through exe.py on every engine.
+exe.py puts its stdin in raw mode, so each run gets a pseudo-terminal as stdin.
+"""
+
+################
+# HELPERS
+################
+
+
+EXE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exe.py")
+ENGINES = ("interpreter", "closure", "vm", "python")
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "openpty"), reason="needs a pseudo-terminal")
+
+
+def ble(directory, text, *options, modules={}):
+    for name, source in modules.items():
+        (directory / f"{name}.ble").write_text(source)
+    fn = directory / "main.ble"
+    fn.write_text(text)
+    master, slave = os.openpty()
+    try:
+        result = subprocess.run(
+            [sys.executable, EXE, *options, str(fn)],
+            stdin=slave, capture_output=True, text=True, timeout=300
+        )
+    finally:
+        os.close(master)
+        os.close(slave)
+    return result.stdout
+
+
+################
+# RECURSION
+################
+
+
+RECURSIVE = "fn r(n) if n == 0 0 else 1 + r(n - 1)\n"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def testRecursionLimit(tmp_path, engine):
+    out = ble(
+        tmp_path, RECURSIVE + 'disp r(99)\ntry { r(100) } catch { disp "caught" }\ndisp r(99)\ndisp r(500)',
+        f"--engine={engine}", "--recursion-limit=100"
+    )
+    assert out.startswith("99\ncaught\n99\n")
+    assert "Maximum recursion depth exceeded" in out
+
+
+def testVmDeepRecursion(tmp_path):
+    out = ble(tmp_path, RECURSIVE + "disp r(30000)", "--engine=vm", "--recursion-limit=100000")
+    assert out.split() == ["30000"]
+
+
+################
+# NAME LOOKUP
+################
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("optimize", ("on", "off"))
+def testIncludedModuleIsDetached(tmp_path, engine, optimize):
+    out = ble(
+        tmp_path, 'gx = 5\ninclude "modx" as M\ndisp M.f()',
+        f"--engine={engine}", f"--optimize={optimize}",
+        modules={"modx": "fn f() gx\ndisp f()"}
+    )
+    assert out.split() == ["5", "none"]
+
+
+################
+# LOOPS
+################
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def testReturnInLoopSkipsElse(tmp_path, engine):
+    out = ble(
+        tmp_path,
+        'fn retInFor(n) { for i = 0 to n { if i == 2 return i } else "else" }\n'
+        'fn retInWhile(n) { i = 0; while i < n { if i == 2 return i; i = i + 1 } else "else" }\n'
+        'fn retInForEach(l) { for each x in l { if x == 2 return x } else "else" }\n'
+        'disp retInFor(5)\ndisp retInWhile(5)\ndisp retInForEach([1, 2, 3])\ndisp retInFor(1)',
+        f"--engine={engine}"
+    )
+    assert out.split() == ["2", "2", "2", "else"]
+
+
+################
+# LISTS
+################
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def testListComparisonsUseElementValues(tmp_path, engine):
+    out = ble(
+        tmp_path,
+        "a = [1, 2]\nb = a()\nc = [1, 3]\n"
+        "disp a != b\ndisp a == b\ndisp a != c\ndisp a < c\ndisp c < a\ndisp a <= b\ndisp a > [1]\n"
+        'disp [[1, 2], "x"] != [[1, 2], "y"]\ndisp ["a", "b"] < ["a", "c"]',
+        f"--engine={engine}"
+    )
+    assert out.split() == ["0", "1", "1", "1", "0", "1", "1", "1", "1"]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("optimize", ("on", "off"))
+def testPooledLiteralsDoNotChangeListComparisons(tmp_path, engine, optimize):
+    out = ble(
+        tmp_path,
+        'fn f() [1, 2]\nfn g() [1, "a", [2]]\ndisp f() != f()\ndisp f() == f()\ndisp g() != g()\ndisp f() != [1, 3]',
+        f"--engine={engine}", f"--optimize={optimize}"
+    )
+    assert out.split() == ["0", "1", "0", "1"]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def testNestedListCopiesKeepValueSemantics(tmp_path, engine):
+    out = ble(
+        tmp_path,
+        'a = [[1, 2], [3, 4], "s"]\nb = a()\nb(0)(1) = 9\ndisp a\ndisp b\n'
+        "r = a(1)\nr(0) = 7\ndisp a\ndisp b\n"
+        "c = b(0, 2)\nc(1)(0) = 5\ndisp b\n"
+        "q = [[1, 2], [3, 4]]\nq2 = q()\nfor each row in q2 { row(1) = 0 }\ndisp q\ndisp q2\n"
+        "s = b(0, 3, 1)\nb(1)(0) = 8\ndisp s\n"
+        "e = [[[1, 2]], [3]]\nf = e()\nf(0)(0)(1) = 6\ndisp e\ndisp f",
+        f"--engine={engine}"
+    )
+    assert out.splitlines() == [
+        '[[1, 2], [3, 4], "s"]', '[[1, 9], [3, 4], "s"]',
+        '[[1, 2], [7, 4], "s"]', '[[1, 9], [3, 4], "s"]',
+        '[[1, 9], [3, 4], "s"]',
+        "[[1, 2], [3, 4]]", "[[1, 0], [3, 0]]",
+        '[[1, 9], [8, 4], "s"]',
+        "[[[1, 2]], [3]]", "[[[1, 6]], [3]]"
+    ]
+
+
+################
+# CONTROL FLOW
+################
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def testTopLevelReturnStopsFile(tmp_path, engine):
+    out = ble(
+        tmp_path,
+        'include "modr" as M\ndisp M.mx\nfor i = 0 to 3 { disp i; if i == 1 return 0 }\ndisp "after"',
+        f"--engine={engine}",
+        modules={"modr": "mx = 1\nreturn 5\nmx = 2"}
+    )
+    assert out.split() == ["1", "0", "1"]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def testTopLevelBreakStopsProgram(tmp_path, engine):
+    out = ble(tmp_path, 'disp 1\nbreak\ndisp 2', f"--engine={engine}")
+    assert out.split() == ["1"]
+
+
+################
+# OPTIMIZER
+################
+
+
+FOLDING = (
+    'disp 10^(-15)\n'
+    'disp (-1)^3\n'
+    'disp 2^10\n'
+    'disp 2^0.5\n'
+    'x = 7\n'
+    'disp x^2\n'
+    'disp (x + 1)^2\n'
+    'disp 3.14159 / 180\n'
+    'disp "ab" + "cd"\n'
+    'disp "ab" * 3\n'
+    'disp 7 / 2\n'
+    'disp 7 % 3\n'
+    'disp not 0\n'
+    'disp -(-4)\n'
+    'disp 1 == 1.0\n'
+    'if 0 disp "dead" elif 1 disp "live" else disp "never"\n'
+    'if 0 1 / 0 else disp "skipped"\n'
+    'fn f(n) (-1)^n\n'
+    'disp f(3)\n'
+    'disp f(4)\n'
+    'try { disp 1 / 0 } catch { disp "caught" }\n'
+    'try { disp "a" - 1 } catch { disp "caught2" }'
+)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("optimize", ("on", "off"))
+def testConstantFoldingKeepsResults(tmp_path, engine, optimize):
+    out = ble(tmp_path, FOLDING, f"--engine={engine}", f"--optimize={optimize}")
+    assert out.splitlines() == [
+        '1e-15',
+        '-1',
+        '1024',
+        '1.4142135623730951',
+        '49',
+        '64',
+        '0.017453277777777776',
+        'abcd',
+        'ababab',
+        '3.5',
+        '1',
+        '1',
+        '4',
+        '1',
+        'live',
+        'skipped',
+        '-1',
+        '1',
+        'caught',
+        '',
+    ]
+
+
+################
+# LITERALS
+################
+
+
+LITERALS = (
+    'fn fresh() { l = [0, "s"]; l(0) = l(0) + 1; l(1) = l(1) + "t"; l }\n'
+    'disp fresh()\n'
+    'disp fresh()\n'
+    'fn tag(n) { s = "x"; for i = 0 to n { s = s + "y" }; s }\n'
+    'disp tag(2)\n'
+    'disp tag(1)\n'
+    'a = true\n'
+    'b = true\n'
+    'disp a == b\n'
+    'disp true + 1\n'
+    'disp false\n'
+    'disp none\n'
+    'disp none == none\n'
+    'c = [true, false, none, 1, 1]\n'
+    'c(0) = 5\n'
+    'disp c\n'
+    'disp true\n'
+    'for i = 0 to 3 { n = 1; n = n + i; disp n }\n'
+    'disp 1 < 2\n'
+    'disp 2 < 1\n'
+    'disp (1 < 2) + (1 < 2)'
+)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("optimize", ("on", "off"))
+def testPooledLiteralsStayFresh(tmp_path, engine, optimize):
+    out = ble(tmp_path, LITERALS, f"--engine={engine}", f"--optimize={optimize}")
+    assert out.splitlines() == [
+        '[1, "st"]',
+        '[1, "st"]',
+        'xyy',
+        'xy',
+        '1',
+        '2',
+        '0',
+        'none',
+        '1',
+        '[5, 0, none, 1, 1]',
+        '1',
+        '1',
+        '2',
+        '3',
+        '1',
+        '0',
+        '2',
+    ]
+
+
+################
+# COPY ON WRITE
+################
+
+
+FLAT_COPIES = (
+    'a = [1, 2, 3]\n'
+    'b = a()\n'
+    'b(0) = 9\n'
+    'disp a\n'
+    'disp b\n'
+    'c = a(0, 2)\n'
+    'c(1) = 7\n'
+    'disp a\n'
+    'disp c\n'
+    'm = a * 2\n'
+    'm(0) = 5\n'
+    'disp a\n'
+    'disp m\n'
+    'p = a + [4]\n'
+    'p(3) = 0\n'
+    'disp a\n'
+    'disp p\n'
+    'fn bump(l) { l(0) = l(0) + 100; l }\n'
+    'd = bump(a())\n'
+    'disp a\n'
+    'disp d\n'
+    'for each x in a { a(2) = x * 10; disp x }\n'
+    'disp a\n'
+    'e = ["x", "y"]\n'
+    'f = e()\n'
+    'for each s in f { f(1) = "z"; disp s }\n'
+    'disp e\n'
+    'disp f'
+)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("optimize", ("on", "off"))
+def testFlatListCopiesKeepValueSemantics(tmp_path, engine, optimize):
+    out = ble(tmp_path, FLAT_COPIES, f"--engine={engine}", f"--optimize={optimize}")
+    assert out.splitlines() == [
+        '[1, 2, 3]',
+        '[9, 2, 3]',
+        '[1, 2, 3]',
+        '[1, 7]',
+        '[1, 2, 3]',
+        '[5, 2, 3, 1, 2, 3]',
+        '[1, 2, 3]',
+        '[1, 2, 3, 0]',
+        '[1, 2, 3]',
+        '[101, 2, 3]',
+        '1',
+        '2',
+        '20',
+        '[1, 2, 200]',
+        'x',
+        'z',
+        '["x", "y"]',
+        '["x", "z"]',
+    ]
+
+
+################
+# ARITHMETIC
+################
+
+
+ARITHMETIC = (
+    'fn series(x, n) {\n'
+    '    s = 0\n'
+    '    t = 1\n'
+    '    for i = 1 to n { t = t * x / i; s = s + t }\n'
+    '    s\n'
+    '}\n'
+    'disp series(1, 12)\n'
+    'disp series(2.5, 10)\n'
+    'fn big(n) { r = 1; for i = 1 to n { r = r * i }; r }\n'
+    'disp big(25)\n'
+    'x = 3\n'
+    'y = 4\n'
+    'disp x * x + y * y < 5 * 5\n'
+    'disp x * x + y * y <= 5 * 5\n'
+    'disp -x + +y\n'
+    'disp -(x - y) * 2\n'
+    'disp 7 % -3\n'
+    'disp -7 % 3\n'
+    'disp 2 ^ -1\n'
+    'disp 10 / 4\n'
+    'disp 10 / 5\n'
+    'disp (x + 0.5) * 2\n'
+    'disp 1 - 0.1 - 0.1\n'
+    'disp x == 3.0\n'
+    'disp not (x > y)\n'
+    'l = [x * 2, x / 2]\n'
+    'disp l\n'
+    'disp "n" + x * 2\n'
+    'try { disp x / (y - 4) } catch { disp "div" }\n'
+    'try { disp x + "a" } catch { disp "type" }\n'
+    'try { disp x % 0 } catch { disp "mod" }\n'
+    'fn hyp(a, b) { c = a * a + b * b; c ^ 0.5 }\n'
+    'disp hyp(3, 4)\n'
+    'disp hyp(5, 12)'
+)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("optimize", ("on", "off"))
+def testUnboxedArithmeticKeepsResults(tmp_path, engine, optimize):
+    out = ble(tmp_path, ARITHMETIC, f"--engine={engine}", f"--optimize={optimize}")
+    assert out.splitlines() == [
+        '1.7182818261984931',
+        '11.179115120485767',
+        '620448401733239439360000',
+        '0',
+        '1',
+        '1',
+        '2',
+        '-2',
+        '2',
+        '0.5',
+        '2.5',
+        '2.0',
+        '7.0',
+        '0.8',
+        '1',
+        '1',
+        '[6, 1.5]',
+        '7',
+        'div',
+        '4',
+        'mod',
+        '5.0',
+        '13.0',
+    ]
+
+
+################
+# QUICKENING
+################
+
+
+QUICKENED = (
+    'fn add(a, b) a + b\n'
+    'r = 0\n'
+    'for i = 0 to 20 { r = add(r, i) }\n'
+    'disp r\n'
+    'disp add("a", "b")\n'
+    'disp add([1], [2])\n'
+    'disp add(1.5, 2)\n'
+    'for i = 0 to 20 { r = add(r, 1) }\n'
+    'disp r\n'
+    'fn one(x) 1\n'
+    'fn two(x) 2\n'
+    'f = one\n'
+    's = 0\n'
+    'for i = 0 to 20 { if i == 12 f = two; s = s + f(i) }\n'
+    'disp s\n'
+    'g = one\n'
+    'for i = 0 to 12 { if i == 10 g = [7, 8, 9]; disp g(0) }\n'
+    'class P { v = 1 }\n'
+    'class Q { w = 0; v = 10 }\n'
+    'p = P()\n'
+    'q = 0\n'
+    'for i = 0 to 12 { q = q + p.v; if i == 9 p = Q() }\n'
+    'disp q\n'
+    'fn h(x) x * 2\n'
+    't = ""\n'
+    'for i = 0 to 12 { t = t + h(i) }\n'
+    'disp t\n'
+    'm = 0\n'
+    'for i = 0 to 12 { m = h(m + 1); if i == 10 m = "s" }\n'
+    'disp m'
+)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("optimize", ("on", "off"))
+def testQuickenedNodesDeoptimize(tmp_path, engine, optimize):
+    out = ble(tmp_path, QUICKENED, f"--engine={engine}", f"--optimize={optimize}")
+    assert out.splitlines() == [
+        '190',
+        'ab',
+        '[1, 2]',
+        '3.5',
+        '210',
+        '28',
+        '1',
+        '1',
+        '1',
+        '1',
+        '1',
+        '1',
+        '1',
+        '1',
+        '1',
+        '1',
+        '7',
+        '7',
+        '30',
+        '132',
+        '4',
+    ]
+
+
+################
+# TIERING
+################
+
+
+TIERED = (
+    'fn sq(x) x * x\n'
+    's = 0\n'
+    'for i = 0 to 10 { s = s + sq(i) }\n'
+    'disp s\n'
+    'fn counter() { n = 0; fn inc() { n = n + 1 }; inc(); inc(); inc(); inc(); n }\n'
+    'disp counter()\n'
+    'disp counter()\n'
+    'fn find(l, v) { for each x in l { if x == v return "found" } else "missing" }\n'
+    'for i = 0 to 6 { disp find([1, 2, 3], i) }\n'
+    't = 0\n'
+    'i = 0\n'
+    'while i < 20 { i = i + 1; if i == 15 break; t = t + i } else disp "no"\n'
+    'disp t\n'
+    'for i = 0 to 12 { if i == 8 sq = fn(x) x + 1000; disp sq(i) }\n'
+    'fn risky(x) 10 / x\n'
+    'for i = -3 to 4 { try { disp risky(i) } catch { disp "err" } }'
+)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def testTierUpKeepsResults(tmp_path, engine):
+    out = ble(
+        tmp_path, TIERED,
+        f"--engine={engine}", "--tier-up-calls=3", "--tier-up-iterations=5", "--tier-log"
+    ).splitlines()
+    events = [line for line in out if line.startswith("Tier-up: ")]
+    assert [line for line in out if line not in events] == [
+        '285',
+        '0',
+        '0',
+        'missing',
+        'found',
+        'found',
+        'found',
+        'missing',
+        'missing',
+        '105',
+        '0',
+        '1',
+        '4',
+        '9',
+        '16',
+        '25',
+        '36',
+        '49',
+        '1008',
+        '1009',
+        '1010',
+        '1011',
+        '-3.3333333333333335',
+        '-5.0',
+        '-10.0',
+        'err',
+        '10.0',
+        '5.0',
+        '3.3333333333333335',
+    ]
+    if engine == "interpreter":
+        assert any(event.startswith("Tier-up: function find ") for event in events)
+        assert any(event.startswith("Tier-up: while loop ") for event in events)
+    else:
+        assert events == []
+
+
+################
+# INLINING
+################
+
+
+INLINED = (
+    'fn sq(x) x * x\n'
+    'fn inv(x) 1 / x\n'
+    'fn pick(c, a, b) if c a else b\n'
+    'disp sq(3)\n'
+    'disp sq(sq(2))\n'
+    'disp pick(1, "yes", "no")\n'
+    'disp pick(0, "yes", "no")\n'
+    'try { disp inv(0) } catch { disp "caught" }\n'
+    'disp inv(4)\n'
+    'try { disp sq("ab") } catch { disp "illegal" }\n'
+    'fn wrap() { sq = fn(v) v + 100; sq(1) }\n'
+    'disp wrap()\n'
+    'disp sq(5)\n'
+    'fn apply(f, v) f(v)\n'
+    'disp apply(sq, 6)\n'
+    'disp sq(7)\n'
+    'disp inv(2)'
+)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("optimize", ("on", "off"))
+def testInlinedCallsFallBackWhenRebound(tmp_path, engine, optimize):
+    out = ble(
+        tmp_path, INLINED, f"--engine={engine}", f"--optimize={optimize}", "--inline-log"
+    ).splitlines()
+    events = [line for line in out if line.startswith("Inlining: ")]
+    assert [line for line in out if line not in events] == [
+        '9',
+        '16',
+        'yes',
+        'no',
+        'caught',
+        '0.25',
+        'illegal',
+        '101',
+        '25',
+        '36',
+        '49',
+        '0.5',
+    ]
+    if optimize == "on":
+        assert any(event.startswith("Inlining: inlined sq ") and event.endswith("line 11)") for event in events)
+        assert any(event.startswith("Inlining: inlined inv ") and event.endswith("line 17)") for event in events)
+        assert any(event.startswith("Inlining: kept call to sq ") for event in events)
+    else:
+        assert events == []
+
+
+################
+# SWITCH TABLES
+################
+
+
+SWITCHED = (
+    'include "string" as S\n'
+    'disp S.lower("Hello WORLD 123 Zz")\n'
+    'big = 11\n'
+    'disp S.upper("Hello world 123 zZ")\n'
+    'fn kind(x){\n'
+    '    if x == 1 "one" elif x == 2 "two" elif 3 == x "three" elif x == 4 "four" elif x == 2 "dup" elif x == "1" "str1" elif x == big "big" else "other"\n'
+    '}\n'
+    'disp kind(1)\n'
+    'disp kind(2)\n'
+    'disp kind(3)\n'
+    'disp kind(4)\n'
+    'disp kind(5)\n'
+    'disp kind("1")\n'
+    'disp kind(1.0)\n'
+    'disp kind([1])\n'
+    'disp kind(none)\n'
+    'disp kind(11)\n'
+    'fn name(s){ if s == "a" "A" elif s == "b" "B" elif s == "c" "C" elif s == "d" "D" }\n'
+    'disp name("c")\n'
+    'disp name("z")\n'
+    'disp name(3)\n'
+    'fn tail(n, acc){ if n == 0 acc elif n == 1 tail(0, acc + 1) elif n == 2 tail(1, acc + 2) elif n == 3 tail(2, acc + 3) else tail(n - 1, acc) }\n'
+    'disp tail(500, 0)\n'
+    'n = 0\n'
+    'for i = 0 to 2000 { n = n + (if kind(i % 7) == "other" 1 else 2) }\n'
+    'disp n'
+)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("optimize", ("on", "off"))
+def testSwitchTablesKeepResults(tmp_path, engine, optimize):
+    out = ble(tmp_path, SWITCHED, f"--engine={engine}", f"--optimize={optimize}")
+    assert out.splitlines() == [
+        'hello world 123 zz',
+        'HELLO WORLD 123 ZZ',
+        'one',
+        'two',
+        'three',
+        'four',
+        'other',
+        'str1',
+        'one',
+        'one',
+        'other',
+        'big',
+        'C',
+        'none',
+        'none',
+        '6',
+        '3144',
+    ]
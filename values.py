@@ -1,62 +1,62 @@
+import operator
 import sys
 
-from error import RTError
+from error import RTError, OperationError
 import languageInterpreter as li
 from languageLexer import Token
-from tokens import TT_IDENTIFIER
+from tokens import (
+    TT_IDENTIFIER, TT_KEYWORD, TT_PLUS, TT_MINUS, TT_MUL, TT_DIV, TT_MOD, TT_POW,
+    TT_EE, TT_NE, TT_LT, TT_GT, TT_LTE, TT_GTE
+)
 
 ################
 # VALUES
 ################
 
 
+RECURSION_LIMIT = 200 if sys.platform == "ios" else 1000
+callDepth = 0
+
+
 class Value:
+    __slots__ = ("value",)
+    context = None
+
     def __init__(self):
         self.value = None
-        self.setPos()
-        self.setContext()
-
-    def setPos(self, startPos=None, endPos=None):
-        self.startPos = startPos
-        self.endPos = endPos
-        return self
-
-    def setContext(self, context=None):
-        self.context = context
-        return self
 
     def addedTo(self, other):
-        return None, self.illegalOperation(other)
+        return None, self.illegalOperation()
 
     def subbedBy(self, other):
-        return None, self.illegalOperation(other)
+        return None, self.illegalOperation()
 
     def multedBy(self, other):
-        return None, self.illegalOperation(other)
+        return None, self.illegalOperation()
 
     def divedBy(self, other):
-        return None, self.illegalOperation(other)
+        return None, self.illegalOperation()
 
     def powedBy(self, other):
-        return None, self.illegalOperation(other)
+        return None, self.illegalOperation()
 
     def isEqual(self, other):
-        return Number(0).setContext(self.context), None
+        return FALSE, None
 
     def isNotEqual(self, other):
-        return Number(1).setContext(self.context), None
+        return TRUE, None
 
     def isLessThan(self, other):
-        return None, self.illegalOperation(other)
+        return None, self.illegalOperation()
 
     def isGreaterThan(self, other):
-        return None, self.illegalOperation(other)
+        return None, self.illegalOperation()
 
     def isLessThanOrEqual(self, other):
-        return None, self.illegalOperation(other)
+        return None, self.illegalOperation()
 
     def isGreaterThanOrEqual(self, other):
-        return None, self.illegalOperation(other)
+        return None, self.illegalOperation()
 
     def isTrue(self):
         return False
@@ -67,62 +67,79 @@ class Value:
     def boolAnd(self, other):
         sTrue = self.isTrue()
         oTrue = other.isTrue()
-        return Number(
-            1 if sTrue and oTrue else 0
-        ).setContext(self.context), None
+        return boolean(sTrue and oTrue), None
 
     def boolOr(self, other):
         sTrue = self.isTrue()
         oTrue = other.isTrue()
-        return Number(
-            1 if sTrue or oTrue else 0
-        ).setContext(self.context), None
+        return boolean(sTrue or oTrue), None
 
     def boolNot(self):
-        return Number(0 if self.isTrue() else 1).setContext(self.context), None
+        return boolean(self.isFalse()), None
 
-    def execute(self, args, context, dev=False):
-        return li.RTResult().failure(self.illegalOperation())
+    def execute(self, args, context, node, interpreter=None):
+        raise RTError(
+            node.startPos, node.endPos,
+            "Illegal operation",
+            context
+        )
     
-    def access(self, varNameTkn):
-        return None, self.illegalOperation(varNameTkn)
-
-    def illegalOperation(self, other=None):
-        if other is None:
-            other = self
-        return RTError(
-            self.startPos, other.endPos,
+    def access(self, node, context):
+        return None, RTError(
+            node.startPos, node.endPos,
             "Illegal operation",
-            self.context
+            context
         )
 
+    def lookup(self, name, tables):
+        return None
+
+    def illegalOperation(self):
+        return OperationError("Illegal operation")
+
     def copy(self):
         raise Exception("No copy method defined")
 
 
+class ContextValue(Value):
+    __slots__ = ("context",)
+
+    def __init__(self):
+        super().__init__()
+        self.context = None
+
+    def setContext(self, context=None):
+        self.context = context
+        return self
+
+
 class NoneValue(Value):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
         self.value = None
     
     def isEqual(self, other):
         if isinstance(other, NoneValue):
-            return Number(1).setContext(self.context), None
-        return Number(0).setContext(self.context), None
+            return TRUE, None
+        return FALSE, None
     
     def isTrue(self):
         return False
     
     def isNotEqual(self, other):
         if isinstance(other, NoneValue):
-            return Number(0).setContext(self.context), None
-        return Number(1).setContext(self.context), None
+            return FALSE, None
+        return TRUE, None
     
     def __repr__(self):
         return "none"
 
 
 class Number(Value):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__()
         self.value = value
@@ -131,148 +148,128 @@ class Number(Value):
         if isinstance(other, Number):
             return Number(
                 self.value + other.value
-            ).setContext(self.context), None
+            ), None
         if isinstance(other, String) or isinstance(other, List):
             return Number(
                 self.value + len(other.value)
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            ), None
+        return None, self.illegalOperation()
 
     def subbedBy(self, other):
         if isinstance(other, Number):
             return Number(
                 self.value - other.value
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            ), None
+        return None, self.illegalOperation()
 
     def multedBy(self, other):
         if isinstance(other, Number):
             return Number(
                 self.value * other.value
-            ).setContext(self.context), None
+            ), None
         if isinstance(other, String) and isinstance(self.value, int):
             return String(
                 other.value * self.value
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            ), None
+        return None, self.illegalOperation()
 
     def divedBy(self, other):
         if isinstance(other, Number):
             if other.value == 0:
-                return None, RTError(
-                    other.startPos, other.endPos,
-                    "Division by zero",
-                    self.context
-                )
+                return None, OperationError("Division by zero", True)
             return Number(
                 self.value / other.value
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            ), None
+        return None, self.illegalOperation()
 
     def moddedBy(self, other):
         if isinstance(other, Number):
             if other.value == 0:
-                return None, RTError(
-                    other.startPos, other.endPos,
-                    "Modulo by zero",
-                    self.context
-                )
+                return None, OperationError("Modulo by zero", True)
             return Number(
                 self.value % other.value
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            ), None
+        return None, self.illegalOperation()
 
     def powedBy(self, other):
         if isinstance(other, Number):
             return Number(
                 self.value ** other.value
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            ), None
+        return None, self.illegalOperation()
 
     def isEqual(self, other):
         if isinstance(other, Number):
-            return Number(
-                1 if self.value == other.value else 0
-            ).setContext(self.context), None
+            return boolean(self.value == other.value), None
         """
         if isinstance(other, String) and isinstance(self.value, int):
-            return Number(
-                1 if self.value == len(other.value) else 0
-            ).setContext(self.context), None
+            return boolean(self.value == len(other.value)), None
         """
-        return Number(0).setContext(self.context), None
+        return FALSE, None
 
     def isNotEqual(self, other):
         if isinstance(other, Number):
-            return Number(
-                1 if self.value != other.value else 0
-            ).setContext(self.context), None
+            return boolean(self.value != other.value), None
         """
         if isinstance(other, String) and isinstance(self.value, int):
-            return Number(
-                1 if self.value != len(other.value) else 0
-            ).setContext(self.context), None
+            return boolean(self.value != len(other.value)), None
         """
-        return Number(1).setContext(self.context), None
+        return TRUE, None
 
     def isLessThan(self, other):
         if isinstance(other, Number):
-            return Number(
-                1 if self.value < other.value else 0
-            ).setContext(self.context), None
+            return boolean(self.value < other.value), None
         if isinstance(other, String) and isinstance(self.value, int):
-            return Number(
-                1 if self.value < len(other.value) else 0
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            return boolean(self.value < len(other.value)), None
+        return None, self.illegalOperation()
 
     def isGreaterThan(self, other):
         if isinstance(other, Number):
-            return Number(
-                1 if self.value > other.value else 0
-            ).setContext(self.context), None
+            return boolean(self.value > other.value), None
         if isinstance(other, String) and isinstance(self.value, int):
-            return Number(
-                1 if self.value > len(other.value) else 0
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            return boolean(self.value > len(other.value)), None
+        return None, self.illegalOperation()
 
     def isLessThanOrEqual(self, other):
         if isinstance(other, Number):
-            return Number(
-                1 if self.value <= other.value else 0
-            ).setContext(self.context), None
+            return boolean(self.value <= other.value), None
         if isinstance(other, String) and isinstance(self.value, int):
-            return Number(
-                1 if self.value <= len(other.value) else 0
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            return boolean(self.value <= len(other.value)), None
+        return None, self.illegalOperation()
 
     def isGreaterThanOrEqual(self, other):
         if isinstance(other, Number):
-            return Number(
-                1 if self.value >= other.value else 0
-            ).setContext(self.context), None
+            return boolean(self.value >= other.value), None
         if isinstance(other, String) and isinstance(self.value, int):
-            return Number(
-                1 if self.value >= len(other.value) else 0
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            return boolean(self.value >= len(other.value)), None
+        return None, self.illegalOperation()
 
     def isTrue(self):
         return self.value != 0
 
     def copy(self):
-        copy = Number(self.value)
-        copy.setPos(self.startPos, self.endPos)
-        copy.setContext(self.context)
-        return copy
+        return self
 
     def __repr__(self):
         return str(self.value)
 
 
+FALSE = Number(0)
+TRUE = Number(1)
+NONE = NoneValue()
+
+
+def box(value):
+    return value if isinstance(value, Value) else Number(value)
+
+
+def boolean(condition):
+    return TRUE if condition else FALSE
+
+
 class String(Value):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__()
         self.value = value
@@ -281,148 +278,120 @@ class String(Value):
         if isinstance(other, String):
             return String(
                 self.value + other.value
-            ).setContext(self.context), None
+            ), None
         if isinstance(other, Number):
             return Number(
                 len(self.value) + other.value
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            ), None
+        return None, self.illegalOperation()
 
     def subbedBy(self, other):
         if isinstance(other, String):
             if len(other.value) == 0:
-                return String(self.value).setContext(self.context), None
+                return String(self.value), None
             return String(
                 "".join(self.value.split(other.value))
-            ).setContext(self.context), None
+            ), None
         if isinstance(other, Number) and isinstance(other.value, int):
             return String(
                 self.value[:-other.value] if other.value > 0 else self.value
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            ), None
+        return None, self.illegalOperation()
 
     def multedBy(self, other):
         if isinstance(other, Number) and isinstance(other.value, int):
             return String(
                 self.value * other.value
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            ), None
+        return None, self.illegalOperation()
 
     def isEqual(self, other):
         if isinstance(other, String):
-            return Number(
-                1 if self.value == other.value else 0
-            ).setContext(self.context), None
+            return boolean(self.value == other.value), None
         """
         if isinstance(other, Number) and isinstance(other.value, int):
-            return Number(
-                1 if len(self.value) == other.value else 0
-            ).setContext(self.context), None
+            return boolean(len(self.value) == other.value), None
         """
-        return Number(0).setContext(self.context), None
+        return FALSE, None
 
     def isNotEqual(self, other):
         if isinstance(other, String):
-            return Number(
-                1 if self.value != other.value else 0
-            ).setContext(self.context), None
+            return boolean(self.value != other.value), None
         """
         if isinstance(other, Number) and isinstance(other.value, int):
-            return Number(
-                1 if len(self.value) != other.value else 0
-            ).setContext(self.context), None
+            return boolean(len(self.value) != other.value), None
         """
-        return Number(1).setContext(self.context), None
+        return TRUE, None
 
     def isLessThan(self, other):
         if isinstance(other, String):
-            return Number(
-                1 if self.value < other.value else 0
-            ).setContext(self.context), None
+            return boolean(self.value < other.value), None
         if isinstance(other, Number) and isinstance(other.value, int):
-            return Number(
-                1 if len(self.value) < other.value else 0
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            return boolean(len(self.value) < other.value), None
+        return None, self.illegalOperation()
 
     def isGreaterThan(self, other):
         if isinstance(other, String):
-            return Number(
-                1 if self.value > other.value else 0
-            ).setContext(self.context), None
+            return boolean(self.value > other.value), None
         if isinstance(other, Number) and isinstance(other.value, int):
-            return Number(
-                1 if len(self.value) > other.value else 0
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            return boolean(len(self.value) > other.value), None
+        return None, self.illegalOperation()
 
     def isLessThanOrEqual(self, other):
         if isinstance(other, String):
-            return Number(
-                1 if self.value <= other.value else 0
-            ).setContext(self.context), None
+            return boolean(self.value <= other.value), None
         if isinstance(other, Number) and isinstance(other.value, int):
-            return Number(
-                1 if len(self.value) <= other.value else 0
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            return boolean(len(self.value) <= other.value), None
+        return None, self.illegalOperation()
 
     def isGreaterThanOrEqual(self, other):
         if isinstance(other, String):
-            return Number(
-                1 if self.value >= other.value else 0
-            ).setContext(self.context), None
+            return boolean(self.value >= other.value), None
         if isinstance(other, Number) and isinstance(other.value, int):
-            return Number(
-                1 if len(self.value) >= other.value else 0
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            return boolean(len(self.value) >= other.value), None
+        return None, self.illegalOperation()
     
     def isTrue(self):
         return len(self.value) > 0
     
-    def execute(self, args, context, dev=False):
-        res = li.RTResult()
+    def execute(self, args, context, node, interpreter=None):
         if len(args) == 1:
             idx = args[0]
             if isinstance(idx, Number) and isinstance(idx.value, int):
                 if idx.value >= len(self.value) or idx.value < -len(self.value):
-                    return res.failure(RTError(
-                        idx.startPos, idx.endPos,
+                    raise RTError(
+                        node.argNodes[0].startPos, node.argNodes[0].endPos,
                         "Index out of range",
-                        self.context
-                    ))
-                return res.success(String(
+                        context
+                    )
+                return String(
                     self.value[idx.value]
-                ).setContext(self.context))
+                )
         elif len(args) == 2:
             idxFrom = args[0]
             idxTo = args[1]
             if isinstance(idxFrom, Number) and isinstance(idxFrom.value, int) and isinstance(idxTo, Number) and isinstance(idxTo.value, int):
-                return res.success(String(
+                return String(
                     self.value[idxFrom.value:idxTo.value]
-                ).setContext(self.context))
+                )
         elif len(args) == 3:
             idxFrom = args[0]
             idxTo = args[1]
             idxStep = args[2]
             if isinstance(idxFrom, Number) and isinstance(idxFrom.value, int) and isinstance(idxTo, Number) and isinstance(idxTo.value, int) and isinstance(idxStep, Number) and isinstance(idxStep.value, int):
                 if idxStep.value == 0:
-                    return res.failure(RTError(
-                        idxStep.startPos, idxStep.endPos,
+                    raise RTError(
+                        node.argNodes[2].startPos, node.argNodes[2].endPos,
                         "Slice step cannot be zero",
-                        self.context
-                    ))
-                return res.success(String(
+                        context
+                    )
+                return String(
                     self.value[idxFrom.value:idxTo.value:idxStep.value]
-                ).setContext(self.context))
-        return res.failure(self.illegalOperation(args[-1] if len(args) > 0 else None))
+                )
+        return super().execute(args, context, node, interpreter)
 
     def copy(self):
-        copy = String(self.value)
-        copy.setPos(self.startPos, self.endPos)
-        copy.setContext(self.context)
-        return copy
+        return self
     
     def __repr__(self):
         escapeChars = {
@@ -451,20 +420,58 @@ class String(Value):
 
 
 class List(Value):
+    __slots__ = ("shared", "flat", "shareable")
+
     def __init__(self, value):
         super().__init__()
         self.value = value
+        self.shared = False
+        self.flat = None
+        self.shareable = None
+
+    def isFlat(self):
+        if self.flat is None:
+            self.flat = all(type(val) in LEAF_TYPES for val in self.value)
+        return self.flat
+
+    def isShareable(self):
+        if self.shareable is None:
+            self.shareable = self.isFlat() or all(type(val) in SHAREABLE_TYPES for val in self.value)
+        return self.shareable
+
+    def unshare(self):
+        if self.shared:
+            if self.isFlat():
+                self.value = list(self.value)
+            else:
+                self.value = [val.copy() if type(val) is List else val for val in self.value]
+            self.shared = False
+
+    def items(self):
+        if self.shared and not self.isFlat():
+            self.unshare()
+        return self.value
+
+    def setItem(self, idx, value):
+        self.unshare()
+        value = value.copy()
+        self.value[idx] = value
+        if self.flat and type(value) not in LEAF_TYPES:
+            self.flat = False
+        if self.shareable and type(value) not in SHAREABLE_TYPES:
+            self.shareable = False
     
     def addedTo(self, other):
         if isinstance(other, List):
-            return List(
-                self.value + other.value
-            ).setContext(self.context), None
+            result = List(self.items() + other.items())
+            if self.flat and other.flat:
+                result.flat = True
+            return result, None
         if isinstance(other, Number):
             return Number(
                 len(self.value) + other.value
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            ), None
+        return None, self.illegalOperation()
     
     def subbedBy(self, other):
         contains = False
@@ -475,15 +482,19 @@ class List(Value):
             if equal.value != 0:
                 contains = True
                 break
-        return Number(1 if contains else 0).setContext(self.context), None
+        return boolean(contains), None
     
     def multedBy(self, other):
         if isinstance(other, Number) and isinstance(other.value, int):
+            if self.isFlat():
+                result = List(self.value * other.value)
+                result.flat = True
+                return result, None
             newValue = []
             for _ in range(other.value):
                 newValue.extend([val.copy() for val in self.value])
-            return List(newValue).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            return List(newValue), None
+        return None, self.illegalOperation()
 
     def isEqual(self, other):
         if isinstance(other, List):
@@ -498,183 +509,233 @@ class List(Value):
                     if notEqual.value != 0:
                         equal = False
                         break
-            return Number(
-                1 if equal else 0
-            ).setContext(self.context), None
+            return boolean(equal), None
         if isinstance(other, Number) and isinstance(other.value, int):
-            return Number(
-                1 if len(self.value) == other.value else 0
-            ).setContext(self.context), None
-        return Number(0).setContext(self.context), None
+            return boolean(len(self.value) == other.value), None
+        return FALSE, None
 
     def isNotEqual(self, other):
         if isinstance(other, List):
-            return Number(
-                1 if self.value != other.value else 0
-            ).setContext(self.context), None
+            equal, err = self.isEqual(other)
+            if err:
+                return None, err
+            return boolean(equal.value == 0), None
         if isinstance(other, Number) and isinstance(other.value, int):
-            return Number(
-                1 if len(self.value) != other.value else 0
-            ).setContext(self.context), None
-        return Number(1).setContext(self.context), None
+            return boolean(len(self.value) != other.value), None
+        return TRUE, None
+
+    def compare(self, other):
+        for left, right in zip(self.value, other.value):
+            equal, err = left.isEqual(right)
+            if err:
+                return None, err
+            if equal.value != 0:
+                continue
+            less, err = left.isLessThan(right)
+            if err:
+                return None, err
+            return (-1 if less.value != 0 else 1), None
+        return (len(self.value) > len(other.value)) - (len(self.value) < len(other.value)), None
 
     def isLessThan(self, other):
         if isinstance(other, List):
-            return Number(
-                1 if self.value < other.value else 0
-            ).setContext(self.context), None
+            order, err = self.compare(other)
+            if err:
+                return None, err
+            return boolean(order < 0), None
         if isinstance(other, Number) and isinstance(other.value, int):
-            return Number(
-                1 if len(self.value) < other.value else 0
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            return boolean(len(self.value) < other.value), None
+        return None, self.illegalOperation()
 
     def isGreaterThan(self, other):
         if isinstance(other, List):
-            return Number(
-                1 if self.value > other.value else 0
-            ).setContext(self.context), None
+            order, err = self.compare(other)
+            if err:
+                return None, err
+            return boolean(order > 0), None
         if isinstance(other, Number) and isinstance(other.value, int):
-            return Number(
-                1 if len(self.value) > other.value else 0
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            return boolean(len(self.value) > other.value), None
+        return None, self.illegalOperation()
 
     def isLessThanOrEqual(self, other):
         if isinstance(other, List):
-            return Number(
-                1 if self.value <= other.value else 0
-            ).setContext(self.context), None
+            order, err = self.compare(other)
+            if err:
+                return None, err
+            return boolean(order <= 0), None
         if isinstance(other, Number) and isinstance(other.value, int):
-            return Number(
-                1 if len(self.value) <= other.value else 0
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            return boolean(len(self.value) <= other.value), None
+        return None, self.illegalOperation()
 
     def isGreaterThanOrEqual(self, other):
         if isinstance(other, List):
-            return Number(
-                1 if self.value >= other.value else 0
-            ).setContext(self.context), None
+            order, err = self.compare(other)
+            if err:
+                return None, err
+            return boolean(order >= 0), None
         if isinstance(other, Number) and isinstance(other.value, int):
-            return Number(
-                1 if len(self.value) >= other.value else 0
-            ).setContext(self.context), None
-        return None, self.illegalOperation(other)
+            return boolean(len(self.value) >= other.value), None
+        return None, self.illegalOperation()
     
     def isTrue(self):
         return len(self.value) > 0
     
-    def execute(self, args, context, dev=False):
-        res = li.RTResult()
+    def execute(self, args, context, node, interpreter=None):
         if len(args) == 0:
-            return res.success(self.copy())
+            return self.copy()
         elif len(args) == 1:
             idx = args[0]
             if isinstance(idx, Number) and isinstance(idx.value, int):
                 if idx.value >= len(self.value) or idx.value < -len(self.value):
-                    return res.failure(RTError(
-                        idx.startPos, idx.endPos,
+                    raise RTError(
+                        node.argNodes[0].startPos, node.argNodes[0].endPos,
                         "Index out of range",
-                        self.context
-                    ))
-                return res.success(self.value[idx.value])
+                        context
+                    )
+                return self.items()[idx.value]
         elif len(args) == 2:
             idxFrom = args[0]
             idxTo = args[1]
             if isinstance(idxFrom, Number) and isinstance(idxFrom.value, int) and isinstance(idxTo, Number) and isinstance(idxTo.value, int):
-                return res.success(List(
-                    self.value[idxFrom.value:idxTo.value]
-                ).copy().setContext(self.context))
+                sliced = List(self.value[idxFrom.value:idxTo.value])
+                if self.flat:
+                    sliced.flat = True
+                if not sliced.isFlat():
+                    sliced = List([val.copy() for val in sliced.value])
+                return sliced
         elif len(args) == 3:
             idxFrom = args[0]
             idxTo = args[1]
             idxStep = args[2]
             if isinstance(idxFrom, Number) and isinstance(idxFrom.value, int) and isinstance(idxTo, Number) and isinstance(idxTo.value, int) and isinstance(idxStep, Number) and isinstance(idxStep.value, int):
                 if idxStep.value == 0:
-                    return res.failure(RTError(
-                        idxStep.startPos, idxStep.endPos,
+                    raise RTError(
+                        node.argNodes[2].startPos, node.argNodes[2].endPos,
                         "Slice step cannot be zero",
-                        self.context
-                    ))
-                return res.success(List(
-                    self.value[idxFrom.value:idxTo.value:idxStep.value]
-                ).setContext(self.context))
-        return res.failure(self.illegalOperation(args[-1] if len(args) > 0 else None))
+                        context
+                    )
+                return List(
+                    self.items()[idxFrom.value:idxTo.value:idxStep.value]
+                )
+        return super().execute(args, context, node, interpreter)
     
     def copy(self):
-        copy = List([val.copy() for val in self.value])
-        copy.setPos(self.startPos, self.endPos)
-        copy.setContext(self.context)
+        if self.isShareable():
+            copy = List(self.value)
+            copy.shared = self.shared = True
+            copy.flat = self.flat
+            copy.shareable = True
+        else:
+            copy = List([val.copy() for val in self.value])
         return copy
     
     def __repr__(self):
         return str(self.value)
 
 
-class Function(Value):
-    def __init__(self, name, bodyNode, argNames, canMod, isBuiltin):
+LEAF_TYPES = (Number, String)
+SHAREABLE_TYPES = (Number, String, List)
+
+
+class Function(ContextValue):
+    __slots__ = ("name", "bodyNode", "argNames", "canMod", "isBuiltin", "layout", "calls", "frames")
+
+    def __init__(self, name, bodyNode, argNames, canMod, isBuiltin, layout=None):
         super().__init__()
         self.name = name or "<anonymous>"
         self.bodyNode = bodyNode
         self.argNames = argNames
         self.canMod = canMod
         self.isBuiltin = isBuiltin
+        self.layout = layout
+        self.calls = 0
+        self.frames = []
 
-    def execute(self, args, context, dev=False):
-        res = li.RTResult()
-        
-        if sys.platform == "ios":
-            limit = 200
-        else:
-            limit = 1000
-        if context.depth() > limit:
-            return res.failure(RTError(
-                self.startPos, self.endPos,
-                f"Maximum recursion depth exceeded",
-                context
-            ))
-        
-        interpreter = li.Interpreter(dev)
+    def makeContext(self, args, context, node):
         if self.canMod:
             newContext = context
+        elif self.frames:
+            newContext = self.frames.pop()
+            newContext.enter(context, node.startPos)
         else:
-            newContext = li.Context(self.name, context, self.startPos)
-            newContext.symbolTable = li.SymbolTable(context.symbolTable)
+            newContext = li.Context(self.name, context, node.startPos)
+            if self.layout is None:
+                newContext.symbolTable = li.SymbolTable(context.symbolTable)
+            else:
+                newContext.symbolTable = li.SlotSymbolTable(self.layout, context.symbolTable)
         
         if len(args) > len(self.argNames):
             dif = len(args) - len(self.argNames)
-            return res.failure(RTError(
-                self.startPos, self.endPos,
+            raise RTError(
+                node.startPos, node.endPos,
                 f"{dif} too many args passed into {self.name}",
                 context
-            ))
+            )
         
         if len(args) < len(self.argNames):
             dif = len(self.argNames) - len(args)
-            return res.failure(RTError(
-                self.startPos, self.endPos,
+            raise RTError(
+                node.startPos, node.endPos,
                 f"{dif} too few args passed into {self.name}",
                 context
-            ))
-
-        for i, argValue in enumerate(args):
-            argName = self.argNames[i]
-            argValue.setContext(newContext)
-            newContext.symbolTable.set(argName, argValue)
+            )
 
-        value = res.register(interpreter.visit(self.bodyNode, newContext))
-        if res.err:
-            return res
+        if self.layout is not None and self.layout.positional:
+            slots = newContext.symbolTable.slots
+            for i, argValue in enumerate(args):
+                slots[i] = None if isinstance(argValue, NoneValue) else argValue
+        else:
+            for argName, argValue in zip(self.argNames, args):
+                newContext.symbolTable.set(argName, argValue)
+        
+        return newContext
+
+    def release(self, frame):
+        if self.layout is not None and self.layout.reusable:
+            frame.leave()
+            self.frames.append(frame)
+
+    def execute(self, args, context, node, interpreter=None):
+        global callDepth
+        if interpreter is None:
+            interpreter = li.Interpreter(False)
+        if callDepth >= RECURSION_LIMIT:
+            raise RTError(
+                node.startPos, node.endPos,
+                f"Maximum recursion depth exceeded",
+                context
+            )
 
-        if isinstance(value, ReturnValue):
-            value = value.value
-        return res.success(value)
+        callDepth += 1
+        try:
+            function = self
+            while True:
+                newContext = function.makeContext(args, context, node)
+                try:
+                    value = interpreter.visitBody(function, newContext)
+                except li.ReturnSignal as ret:
+                    value = ret.value
+                except RecursionError:
+                    raise RTError(
+                        node.startPos, node.endPos,
+                        f"Maximum recursion depth exceeded",
+                        context
+                    ) from None
+                except li.TailCallSignal as call:
+                    if call.context is not newContext:
+                        function.release(newContext)
+                    function, args, context, node = call.valueToCall, call.args, call.context, call.node
+                    if not isinstance(function, Function):
+                        return function.execute(args, context, node, interpreter)
+                    continue
+                function.release(newContext)
+                return value
+        finally:
+            callDepth -= 1
 
     def copy(self):
-        copy = Function(self.name, self.bodyNode, self.argNames, self.canMod, self.isBuiltin)
+        copy = Function(self.name, self.bodyNode, self.argNames, self.canMod, self.isBuiltin, self.layout)
         copy.setContext(self.context)
-        copy.setPos(self.startPos, self.endPos)
         return copy
 
     def __repr__(self):
@@ -686,41 +747,15 @@ class Function(Value):
         return f"<{prefix}function {self.name}>"
 
 
-class ReturnValue(Value):
-    def __init__(self, value):
-        super().__init__()
-        self.value = value
-
-    def copy(self):
-        copy = ReturnValue(self.value)
-        copy.setContext(self.context)
-        copy.setPos(self.startPos, self.endPos)
-        return copy
-    
-    def __repr__(self):
-        return f"<Return: {self.value}>"
-
-
-class BreakValue(Value):
-    def __init__(self):
-        super().__init__()
-
-    def copy(self):
-        copy = BreakValue()
-        copy.setContext(self.context)
-        copy.setPos(self.startPos, self.endPos)
-        return copy
-    
-    def __repr__(self):
-        return f"<Break>"
-
+class Module(ContextValue):
+    __slots__ = ("moduleContext",)
 
-class Module(Value):
     def __init__(self, moduleContext):
         super().__init__()
         self.moduleContext = moduleContext
     
-    def access(self, varNameTkn):
+    def access(self, node, context):
+        varNameTkn = node.varNameTkn
         value = self.moduleContext.symbolTable.get(varNameTkn.value)
         if value is None:
             return None, li.RTError(
@@ -729,12 +764,17 @@ class Module(Value):
                 self.context
             )
         return value, None
+
+    def lookup(self, name, tables):
+        return self.moduleContext.symbolTable.lookup(name, tables)
     
     def __repr__(self):
         return f"<module {self.moduleContext.displayName}>"
 
 
-class Class(Value):
+class Class(ContextValue):
+    __slots__ = ("name", "parent", "bodyNode", "classContext")
+
     def __init__(self, name, parent, bodyNode, classContext):
         super().__init__()
         self.name = name
@@ -742,22 +782,19 @@ class Class(Value):
         self.bodyNode = bodyNode
         self.classContext = classContext
     
-    def initContext(self):
-        res = li.RTResult()
-        
-        interpreter = li.Interpreter(False)
-        
-        res.register(interpreter.visit(self.bodyNode, self.classContext))
-        if res.err:
-            return res
-        
-        return res.success(self)
+    def initContext(self, interpreter=None):
+        if interpreter is None:
+            interpreter = li.Interpreter(False)
+
+        interpreter.visit(self.bodyNode, self.classContext)
+        return self
     
-    def access(self, varNameTkn):
+    def access(self, node, context):
+        varNameTkn = node.varNameTkn
         value = self.classContext.symbolTable.get(varNameTkn.value)
         if value is None:
             if self.parent:
-                value, err = self.parent.access(varNameTkn)
+                value, err = self.parent.access(node, context)
                 if err:
                     return None, err
                 return value, None
@@ -767,29 +804,141 @@ class Class(Value):
                 self.context
             )
         return value, None
+
+    def lookup(self, name, tables):
+        value = self.classContext.symbolTable.lookup(name, tables)
+        if value is None and self.parent:
+            return self.parent.lookup(name, tables)
+        return value
     
-    def execute(self, args, context, dev=False):
-        res = li.RTResult()
-        
+    def execute(self, args, context, node, interpreter=None):
         instance = self.copy()
         constructor = self.classContext.symbolTable.symbols.get(self.name, None)
         if constructor:
-            res.register(constructor.execute(args, instance.classContext))  # type: ignore
-            if res.err:
-                return res
+            constructor.execute(args, instance.classContext, node, interpreter)  # type: ignore
         elif len(args) > 0:
-            return res.failure(RTError(
-                self.startPos, self.endPos,
+            raise RTError(
+                node.startPos, node.endPos,
                 f"{len(args)} too many args passed into {self.name}",
                 context
-            ))
+            )
         
-        return res.success(instance)
+        return instance
     
     def copy(self):
         return Class(
             self.name, self.parent.copy() if self.parent else None, self.bodyNode, self.classContext.copy()
-        ).setContext(self.context).setPos(self.startPos, self.endPos)
+        ).setContext(self.context)
     
     def __repr__(self):
         return f"<class {self.name}>"
+
+
+################
+# OPERATORS
+################
+
+
+class BinaryOperator:
+    __slots__ = ("name", "handlers", "unboxed")
+
+    def __init__(self, name, handlers, unboxed=None):
+        self.name = name
+        self.handlers = handlers
+        self.unboxed = unboxed
+
+    def apply(self, left, right):
+        handler = self.handlers.get((type(left), type(right)))
+        if handler is None:
+            handler = self.resolve(type(left), type(right))
+        return handler(left, right)
+
+    def resolve(self, leftType, rightType):
+        handler = getattr(leftType, self.name)
+        self.handlers[(leftType, rightType)] = handler
+        return handler
+
+    def specialize(self, leftType, rightType):
+        handler = self.handlers.get((leftType, rightType))
+        if handler is None:
+            handler = self.resolve(leftType, rightType)
+        return handler
+
+
+def divNumbers(left, right):
+    if right.value == 0:
+        return None, OperationError("Division by zero", True)
+    return Number(left.value / right.value), None
+
+
+def modNumbers(left, right):
+    if right.value == 0:
+        return None, OperationError("Modulo by zero", True)
+    return Number(left.value % right.value), None
+
+
+NUMBERS = (Number, Number)
+STRINGS = (String, String)
+
+OPERATORS = {
+    "addedTo": BinaryOperator("addedTo", {
+        NUMBERS: lambda left, right: (Number(left.value + right.value), None),
+        STRINGS: lambda left, right: (String(left.value + right.value), None)
+    }, operator.add),
+    "subbedBy": BinaryOperator("subbedBy", {
+        NUMBERS: lambda left, right: (Number(left.value - right.value), None)
+    }, operator.sub),
+    "multedBy": BinaryOperator("multedBy", {
+        NUMBERS: lambda left, right: (Number(left.value * right.value), None)
+    }, operator.mul),
+    "divedBy": BinaryOperator("divedBy", {NUMBERS: divNumbers}, operator.truediv),
+    "moddedBy": BinaryOperator("moddedBy", {NUMBERS: modNumbers}, operator.mod),
+    "powedBy": BinaryOperator("powedBy", {}, operator.pow),
+    "isEqual": BinaryOperator("isEqual", {
+        NUMBERS: lambda left, right: (boolean(left.value == right.value), None),
+        STRINGS: lambda left, right: (boolean(left.value == right.value), None)
+    }, lambda left, right: boolean(left == right)),
+    "isNotEqual": BinaryOperator("isNotEqual", {
+        NUMBERS: lambda left, right: (boolean(left.value != right.value), None),
+        STRINGS: lambda left, right: (boolean(left.value != right.value), None)
+    }, lambda left, right: boolean(left != right)),
+    "isLessThan": BinaryOperator("isLessThan", {
+        NUMBERS: lambda left, right: (boolean(left.value < right.value), None)
+    }, lambda left, right: boolean(left < right)),
+    "isGreaterThan": BinaryOperator("isGreaterThan", {
+        NUMBERS: lambda left, right: (boolean(left.value > right.value), None)
+    }, lambda left, right: boolean(left > right)),
+    "isLessThanOrEqual": BinaryOperator("isLessThanOrEqual", {
+        NUMBERS: lambda left, right: (boolean(left.value <= right.value), None)
+    }, lambda left, right: boolean(left <= right)),
+    "isGreaterThanOrEqual": BinaryOperator("isGreaterThanOrEqual", {
+        NUMBERS: lambda left, right: (boolean(left.value >= right.value), None)
+    }, lambda left, right: boolean(left >= right)),
+    "boolAnd": BinaryOperator("boolAnd", {}),
+    "boolOr": BinaryOperator("boolOr", {})
+}
+BOOL_AND = OPERATORS["boolAnd"]
+BOOL_OR = OPERATORS["boolOr"]
+
+OPERATOR_NAMES = {
+    TT_PLUS: "addedTo",
+    TT_MINUS: "subbedBy",
+    TT_MUL: "multedBy",
+    TT_DIV: "divedBy",
+    TT_MOD: "moddedBy",
+    TT_POW: "powedBy",
+    TT_EE: "isEqual",
+    TT_NE: "isNotEqual",
+    TT_LT: "isLessThan",
+    TT_GT: "isGreaterThan",
+    TT_LTE: "isLessThanOrEqual",
+    TT_GTE: "isGreaterThanOrEqual",
+    "and": "boolAnd",
+    "or": "boolOr"
+}
+
+
+def binaryOperator(opTkn):
+    key = opTkn.value if opTkn.type == TT_KEYWORD else opTkn.type
+    name = OPERATOR_NAMES.get(key)
+    return None if name is None else OPERATORS[name]